@@ -0,0 +1,237 @@
+"""
+Autopilot that plays Pacman by Monte Carlo search over headless rollouts
+
+Every few ticks the autopilot snapshots the game, tries each way out of
+Pacman's tile in many short rollouts of Game.update and steers towards the
+one with the best average outcome. The ghosts' random choices are the
+chance nodes: each rollout reseeds the map's generator, so the rollouts of
+a move sample different ghost behaviour and their mean estimates its
+expected value. Rollouts are handed out UCB1-style, so the promising moves
+get most of the budget, and the game is restored exactly (RNGs included)
+once the search is done.
+
+    python autopilot.py --ticks 3600 --seed 1 --budget-ms 10
+"""
+
+import argparse
+import math
+import random
+import time
+from collections import deque
+from constants import FPS
+from game import Game
+from headless import HeadlessRunner
+from navigation import UNREACHABLE
+
+
+class Autopilot:
+    """Headless input source (see headless.HeadlessRunner) that searches for Pacman's next direction
+
+    The search per move stops after time_budget seconds or max_rollouts
+    rollouts, whichever comes first; leave time_budget None for runs that
+    must be reproducible. Move statistics are kept in a transposition
+    table keyed by the game state that matters to the search (see
+    state_key), so returning to a position resumes its search instead of
+    starting over.
+    """
+
+    def __init__(self, time_budget=0.01, max_rollouts=None, horizon=90, interval=6, seed=None,
+                 exploration=1.4, death_penalty=1000.0, distance_weight=1.0, max_table_entries=100000):
+        if time_budget is None and max_rollouts is None:
+            raise ValueError("Autopilot needs a time_budget or max_rollouts to bound its search")
+        self.time_budget = time_budget  # Seconds of search per move
+        self.max_rollouts = max_rollouts  # Rollouts per move
+        self.horizon = horizon  # Ticks simulated per rollout
+        self.interval = interval  # Ticks between moves
+        self.random = random.Random(seed)  # Reseeds the ghosts per rollout and drives the rollout policy
+        self.exploration = exploration  # UCB1 exploration constant, in units of the value spread
+        self.death_penalty = death_penalty  # Value of losing a life, against points scored
+        self.distance_weight = distance_weight  # Value per tile of maze distance from the nearest pellet
+        self.max_table_entries = max_table_entries
+        self.table = {}  # state_key -> {direction: [rollouts, total value]}
+        self.rollouts = 0  # Rollouts run in total
+        self.rollout_ticks = 0  # Game updates simulated by rollouts in total
+        self.search_time = 0.0  # Seconds spent searching in total
+        self.moves = 0  # Searches run in total
+        self.table_hits = 0  # Searches that resumed from the transposition table
+
+    def __call__(self, game, tick):
+        if game.game_over or game.win:
+            return "restart"
+        # No search while the level-complete message counts down: a rollout
+        # could reach the next map, which is expensive to build
+        if tick % self.interval or game.level_complete_message:
+            return None
+        return self.choose(game)
+
+    def state_key(self, game):
+        """Hashable summary of the position: Pacman, the ghosts and how many pellets are left
+
+        States that agree on these are treated as the same, which is exact
+        enough for a search that only estimates averages anyway.
+        """
+        pacman = game.pacman
+        ghosts = tuple((ghost.get_grid_position(), ghost.direction, ghost.eaten) for ghost in game.ghosts)
+        return (game.map_index, game.pellets.remaining, pacman.get_grid_position(), pacman.direction,
+                pacman.power_mode, ghosts)
+
+    def choose(self, game):
+        """Search from the current state and return the best direction, or None if Pacman can't move"""
+        grid_x, grid_y = game.pacman.get_grid_position()
+        if not (0 <= grid_x < game.width and 0 <= grid_y < game.height):
+            return None
+        moves = game.navigator.exits(grid_x, grid_y)
+        if not moves:
+            return None
+
+        self.moves += 1
+        key = self.state_key(game)
+        stats = self.table.get(key)
+        if stats is None:
+            if len(self.table) >= self.max_table_entries:
+                self.table.clear()
+            stats = self.table[key] = {move: [0, 0.0] for move in moves}
+        else:
+            self.table_hits += 1
+
+        # Rollouts are scored partly by how far Pacman ends up from the pellet nearest to it now
+        target = self.nearest_pellet(game, grid_x, grid_y)
+        target_distances = game.navigator.distances_from(*target) if target is not None else None
+
+        start = time.perf_counter()
+        deadline = start + self.time_budget if self.time_budget is not None else None
+        root = game.snapshot()
+        profiler, game.profiler = game.profiler, None  # Rollouts are not frames
+        rollouts = 0
+        try:
+            while True:
+                move = self.select(stats)
+                entry = stats[move]
+                entry[0] += 1
+                entry[1] += self.rollout(game, root, move, target_distances)
+                rollouts += 1
+                if self.max_rollouts is not None and rollouts >= self.max_rollouts:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+        finally:
+            game.restore(root)
+            game.profiler = profiler
+        self.rollouts += rollouts
+        self.search_time += time.perf_counter() - start
+
+        return max(stats, key=lambda move: stats[move][1] / stats[move][0] if stats[move][0] else -math.inf)
+
+    def select(self, stats):
+        """UCB1: try every move once, then balance high averages against few rollouts"""
+        total = 0
+        for move, (count, _) in stats.items():
+            if count == 0:
+                return move
+            total += count
+        means = [value / count for count, value in stats.values()]
+        spread = max(max(means) - min(means), 1.0)
+        log_total = math.log(total)
+        best_move = None
+        best_score = -math.inf
+        for (move, (count, value)), mean in zip(stats.items(), means):
+            score = mean + self.exploration * spread * math.sqrt(log_total / count)
+            if score > best_score:
+                best_score = score
+                best_move = move
+        return best_move
+
+    def rollout(self, game, root, move, target_distances):
+        """Play move from the root state for up to horizon ticks and return the outcome's value
+
+        The ghosts get a fresh random seed (a sample of the chance nodes).
+        Pacman keeps going and takes a random way out whenever it gets stuck.
+        """
+        game.restore(root)
+        game.map_rng.seed(self.random.getrandbits(64))
+        pacman = game.pacman
+        score, lives = pacman.score, pacman.lives
+        navigator = game.navigator
+        dt = 1.0 / FPS
+        rand = self.random
+        pacman.next_direction = move
+        ticks = 0
+        while ticks < self.horizon:
+            fx, fy = pacman.fx, pacman.fy
+            game.update(dt)
+            ticks += 1
+            if pacman.lives != lives or game.game_over or game.win or game.level_complete_message:
+                break
+            if pacman.fx == fx and pacman.fy == fy:
+                grid_x, grid_y = pacman.get_grid_position()
+                exits = navigator.exits(grid_x, grid_y)
+                if exits:
+                    pacman.next_direction = rand.choice(exits)
+        self.rollout_ticks += ticks
+
+        value = pacman.score - score - self.death_penalty * (lives - pacman.lives)
+        if target_distances is not None and not game.game_over:
+            grid_x, grid_y = pacman.get_grid_position()
+            distance = target_distances[grid_y * game.width + grid_x]
+            if distance != UNREACHABLE:
+                value -= self.distance_weight * distance
+        return value
+
+    def nearest_pellet(self, game, x, y):
+        """Tile of the pellet closest to (x, y) through the maze, or None if none is in reach
+
+        The breadth-first search stops at the first pellet, so its cost is
+        the area around Pacman rather than the map.
+        """
+        navigator = game.navigator
+        width = navigator.width
+        kinds = game.pellets.kinds
+        masks = navigator.exit_masks
+        exit_offsets = navigator.exit_offsets
+        limit = navigator.horizon if navigator.horizon is not None else UNREACHABLE
+        start = y * width + x
+        seen = {start}
+        queue = deque([(start, 0)])
+        while queue:
+            index, distance = queue.popleft()
+            if kinds[index]:
+                return index % width, index // width
+            if distance >= limit:
+                continue
+            for offset in exit_offsets[masks[index]]:
+                neighbour = index + offset
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append((neighbour, distance + 1))
+        return None
+
+    def rollouts_per_second(self):
+        """Rollout throughput over all searches so far"""
+        return self.rollouts / self.search_time if self.search_time > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Let the autopilot play a headless game and report its speed")
+    parser.add_argument("--ticks", type=int, default=60 * FPS, help="fixed steps to play")
+    parser.add_argument("--seed", type=int, default=None, help="seed for maps and ghost AI")
+    parser.add_argument("--budget-ms", type=float, default=10.0, help="search time per move in milliseconds")
+    parser.add_argument("--rollouts", type=int, default=None,
+                        help="rollouts per move instead of a time budget (reproducible)")
+    parser.add_argument("--horizon", type=int, default=90, help="ticks simulated per rollout")
+    args = parser.parse_args()
+
+    time_budget = args.budget_ms / 1000.0 if args.rollouts is None else None
+    autopilot = Autopilot(time_budget, args.rollouts, args.horizon, seed=args.seed)
+    runner = HeadlessRunner(Game(seed=args.seed), input_source=autopilot)
+    result = runner.run(args.ticks)
+
+    print(f"Played {result['ticks']} ticks in {result['elapsed']:.2f}s: score {result['score']}, "
+          f"lives {result['lives']}, level {result['level']}"
+          + (", won" if result["win"] else ", game over" if result["game_over"] else ""))
+    print(f"Rollouts: {autopilot.rollouts} ({autopilot.rollouts_per_second():.0f}/s, "
+          f"{autopilot.rollout_ticks / autopilot.search_time if autopilot.search_time else 0:.0f} ticks/s), "
+          f"transposition table hits {autopilot.table_hits} of {autopilot.moves} moves")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Batched Pacman simulator stepping N games in lockstep with NumPy
+
+Every game's walls and pellets live in stacked uint8 arrays and every actor
+attribute is a float/int array, so one call to step() advances all games
+with a handful of vectorized operations instead of a Python loop per game
+and per ghost. Ghost decisions read a per-game flow field of maze distances
+to Pacman, rebuilt by a vectorized BFS only for games whose Pacman changed
+tile since it was last needed.
+
+The rules follow the original Pacman.update, Ghost.update and Game.update,
+but game.Game has since moved on and this simulator has not. It keeps
+float pixel positions, while game.Game uses fixed-point integers. Ghosts
+decide on the spot, with no AIScheduler staggering or per-step cap. The
+random draws differ too (NumPy's generator instead of the random module).
+So its games are only statistically similar to game.Game, not
+bit-for-bit identical. Messages are not simulated, since they only
+affect drawing.
+"""
+
+import math
+import random
+import numpy as np
+from constants import TILE_SIZE, MAP_WIDTH, MAP_HEIGHT, MAX_UPDATE_STEP
+from pacman import Pacman
+from ghosts import Ghost
+from levels import LevelGenerator
+from pellets import PELLET, POWER_PELLET
+from navigation import UNREACHABLE
+
+
+# Action codes accepted by step(): 0 keeps the current input
+ACTION_DIRECTIONS = np.array([(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)], dtype=np.int64)
+
+# Candidate moves in the same order Ghost.choose_new_direction tries them
+GHOST_DIRECTIONS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)], dtype=np.int64)
+
+MAX_GHOSTS = 6
+MAX_LEVEL = 2
+
+
+class BatchedGame:
+    def __init__(self, num_games, seed=None, width=MAP_WIDTH, height=MAP_HEIGHT):
+        self.num_games = num_games
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.level_generator = LevelGenerator(width, height, random.Random(seed))
+
+        # Actor parameters come from the scalar classes so both engines agree
+        pacman = Pacman(0, 0)
+        ghost = Ghost(0, 0, None, None)
+        self.pacman_speed = pacman.speed
+        self.ghost_speed = ghost.speed
+        self.power_duration = pacman.power_duration
+        self.direction_change_interval = ghost.direction_change_interval
+        self.collision_distance_sq = (pacman.radius + ghost.radius) ** 2
+        self.level_complete_duration = 3.0
+        self.start_x = (width // 2) * TILE_SIZE + TILE_SIZE // 2
+        self.start_y = (height // 2) * TILE_SIZE + TILE_SIZE // 2
+
+        n, g = num_games, MAX_GHOSTS
+        shape = (n, height, width)
+        self.walls = np.zeros(shape, dtype=np.uint8)
+        self.pellets = np.zeros(shape, dtype=np.uint8)
+        self.power_pellets = np.zeros(shape, dtype=np.uint8)
+        self.remaining_pellets = np.zeros(n, dtype=np.int64)
+        self.total_pellets = np.zeros(n, dtype=np.int64)
+        self.pellets_eaten = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.level_complete = np.zeros(n, dtype=bool)
+        self.level_complete_timer = np.zeros(n)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.win = np.zeros(n, dtype=bool)
+
+        self.pacman_x = np.zeros(n)
+        self.pacman_y = np.zeros(n)
+        self.pacman_direction = np.zeros((n, 2), dtype=np.int64)
+        self.pacman_next_direction = np.zeros((n, 2), dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.power_mode = np.zeros(n, dtype=bool)
+        self.power_timer = np.zeros(n)
+        self.ghosts_eaten = np.zeros(n, dtype=np.int64)
+
+        # Ghost arrays are (num_games, MAX_GHOSTS); unused slots are inactive
+        self.ghost_x = np.zeros((n, g))
+        self.ghost_y = np.zeros((n, g))
+        self.ghost_direction = np.zeros((n, g, 2), dtype=np.int64)
+        self.ghost_timer = np.zeros((n, g))
+        self.ghost_last_change = np.zeros((n, g))
+        self.ghost_active = np.zeros((n, g), dtype=bool)
+        self.ghost_eaten = np.zeros((n, g), dtype=bool)
+        self.ghost_vulnerable = np.zeros(n, dtype=bool)
+
+        # Per-game flow field: maze distance of every tile to Pacman's tile,
+        # refreshed lazily for games whose Pacman changed tile
+        self.flow_distance = np.full(shape, UNREACHABLE, dtype=np.int32)
+        self.flow_target = np.full((n, 2), -1, dtype=np.int64)
+
+        self.games = np.arange(n)
+        self.reset()
+
+    def reset(self, indices=None):
+        """Restart the given games (all by default) from level 1"""
+        if indices is None:
+            indices = self.games
+        for i in np.atleast_1d(indices):
+            self.level[i] = 1
+            self.generate_map(i)
+
+    def generate_map(self, i):
+        """Generate a fresh map, Pacman and ghosts for game i (like Game.generate_map)"""
+        walls, pellets, _ = self.level_generator.generate_map(int(self.level[i]))
+        self.walls[i] = walls
+        kinds = np.frombuffer(pellets.kinds, dtype=np.uint8).reshape(self.height, self.width)
+        self.pellets[i] = kinds == PELLET
+        self.power_pellets[i] = kinds == POWER_PELLET
+        total = pellets.remaining
+        self.total_pellets[i] = total
+        self.remaining_pellets[i] = total
+        self.pellets_eaten[i] = 0
+
+        # Game.generate_map creates a brand new Pacman
+        self.pacman_x[i] = self.start_x
+        self.pacman_y[i] = self.start_y
+        self.pacman_direction[i] = 0
+        self.pacman_next_direction[i] = 0
+        self.score[i] = 0
+        self.lives[i] = 3
+        self.power_mode[i] = False
+        self.power_timer[i] = 0
+        self.ghosts_eaten[i] = 0
+
+        ghosts = self.level_generator.create_ghosts(int(self.level[i]), self.width // 2, self.height // 2)
+        self.ghost_active[i] = False
+        self.ghost_eaten[i] = False
+        self.ghost_direction[i] = 0
+        self.ghost_timer[i] = 0
+        self.ghost_last_change[i] = 0
+        for slot, ghost in enumerate(ghosts[:MAX_GHOSTS]):
+            self.ghost_x[i, slot] = ghost.x
+            self.ghost_y[i, slot] = ghost.y
+            self.ghost_active[i, slot] = True
+        self.ghost_vulnerable[i] = False
+
+        self.game_over[i] = False
+        self.win[i] = False
+        self.level_complete[i] = False
+        self.level_complete_timer[i] = 0
+        self.flow_target[i] = -1
+
+    def blocked(self, games, x, y):
+        """Vectorized check_wall_collision: True where (x, y) is a wall or off the map"""
+        tile_x = np.floor_divide(x, TILE_SIZE).astype(np.int64)
+        tile_y = np.floor_divide(y, TILE_SIZE).astype(np.int64)
+        inside = (tile_x >= 0) & (tile_x < self.width) & (tile_y >= 0) & (tile_y < self.height)
+        wall = self.walls[games, np.clip(tile_y, 0, self.height - 1), np.clip(tile_x, 0, self.width - 1)]
+        return ~inside | (wall != 0)
+
+    def step(self, dt, actions=None):
+        """Advance every game by dt seconds, applying optional per-game action codes
+
+        As in Game.update, steps longer than MAX_UPDATE_STEP are split into
+        equal sub-steps, so a long step can't carry an actor past a wall tile.
+        """
+        if actions is not None:
+            playing = ~self.game_over & ~self.win
+            actions = np.asarray(actions)
+            steer = playing & (actions > 0)
+            self.pacman_next_direction[steer] = ACTION_DIRECTIONS[actions[steer]]
+
+        steps = 1
+        if dt > MAX_UPDATE_STEP:
+            steps = math.ceil(dt / MAX_UPDATE_STEP)
+            dt /= steps
+        for _ in range(steps):
+            self.substep(dt)
+
+    def substep(self, dt):
+        """Advance every game by one step of at most MAX_UPDATE_STEP seconds"""
+        self.update_level_complete(dt)
+        # Level changes regenerate games, so recompute who is still playing
+        playing = ~self.game_over & ~self.win
+        if not playing.any():
+            return
+
+        self.update_pacman(dt, playing)
+        pacman_tile_x = np.floor_divide(self.pacman_x, TILE_SIZE).astype(np.int64)
+        pacman_tile_y = np.floor_divide(self.pacman_y, TILE_SIZE).astype(np.int64)
+        self.update_ghosts(dt, playing, pacman_tile_x, pacman_tile_y)
+        self.collect_pellets(playing, pacman_tile_x, pacman_tile_y)
+        self.check_ghost_collisions(playing)
+
+        # Check level completion from the live pellet counter
+        done = playing & (self.remaining_pellets == 0) & ~self.level_complete
+        self.win |= done & (self.level >= MAX_LEVEL)
+        start_next = done & (self.level < MAX_LEVEL)
+        self.level_complete |= start_next
+        self.level_complete_timer[start_next] = 0
+
+    def update_level_complete(self, dt):
+        """Count down level-complete pauses and move finished games to the next level"""
+        pending = self.level_complete
+        if not pending.any():
+            return
+        self.level_complete_timer[pending] += dt
+        for i in np.flatnonzero(pending & (self.level_complete_timer >= self.level_complete_duration)):
+            self.level[i] += 1
+            self.generate_map(i)
+
+    def update_pacman(self, dt, playing):
+        """Vectorized Pacman.update for the games in the playing mask"""
+        powered = playing & self.power_mode
+        self.power_timer[powered] += dt
+        expired = powered & (self.power_timer >= self.power_duration)
+        self.power_mode[expired] = False
+        self.power_timer[expired] = 0
+
+        steering = playing & self.pacman_next_direction.any(axis=1)
+        self.pacman_direction[steering] = self.pacman_next_direction[steering]
+
+        step = self.pacman_speed * dt
+        new_x = self.pacman_x + self.pacman_direction[:, 0] * step
+        new_y = self.pacman_y + self.pacman_direction[:, 1] * step
+        hit = self.blocked(self.games, new_x, new_y)
+        move = playing & ~hit
+        stop = playing & hit
+
+        self.pacman_x[move] = new_x[move]
+        self.pacman_y[move] = new_y[move]
+        self.pacman_direction[stop] = 0
+        self.pacman_x[stop] = np.round(self.pacman_x[stop] / TILE_SIZE) * TILE_SIZE
+        self.pacman_y[stop] = np.round(self.pacman_y[stop] / TILE_SIZE) * TILE_SIZE
+
+    def update_ghosts(self, dt, playing, pacman_tile_x, pacman_tile_y):
+        """Vectorized Ghost.update for every ghost slot of the playing games"""
+        self.ghost_vulnerable[playing] = self.power_mode[playing]
+        moving = playing[:, None] & self.ghost_active & ~self.ghost_eaten
+        if not moving.any():
+            return
+        self.ghost_timer[moving] += dt
+
+        games = self.games[:, None]
+        step = self.ghost_speed * dt
+        ahead_blocked = self.blocked(games,
+                                     self.ghost_x + self.ghost_direction[..., 0] * step,
+                                     self.ghost_y + self.ghost_direction[..., 1] * step)
+        due = self.ghost_timer - self.ghost_last_change > self.direction_change_interval
+        decide = moving & (due | ahead_blocked)
+        self.choose_new_directions(decide, pacman_tile_x, pacman_tile_y)
+        self.ghost_last_change[decide] = self.ghost_timer[decide]
+
+        new_x = self.ghost_x + self.ghost_direction[..., 0] * step
+        new_y = self.ghost_y + self.ghost_direction[..., 1] * step
+        hit = self.blocked(games, new_x, new_y)
+        move = moving & ~hit
+        stop = moving & hit
+
+        self.ghost_x[move] = new_x[move]
+        self.ghost_y[move] = new_y[move]
+        self.choose_new_directions(stop, pacman_tile_x, pacman_tile_y)
+        self.ghost_x[stop] = np.round(self.ghost_x[stop] / TILE_SIZE) * TILE_SIZE
+        self.ghost_y[stop] = np.round(self.ghost_y[stop] / TILE_SIZE) * TILE_SIZE
+
+    def choose_new_directions(self, mask, pacman_tile_x, pacman_tile_y):
+        """Vectorized Ghost.choose_new_direction for the (game, ghost) pairs in mask"""
+        game_idx, slot_idx = np.nonzero(mask)
+        if game_idx.size == 0:
+            return
+
+        grid_x = np.floor_divide(self.ghost_x[game_idx, slot_idx], TILE_SIZE).astype(np.int64)
+        grid_y = np.floor_divide(self.ghost_y[game_idx, slot_idx], TILE_SIZE).astype(np.int64)
+
+        # (k, 4) candidate tiles and which of them are open
+        cand_x = grid_x[:, None] + GHOST_DIRECTIONS[:, 0]
+        cand_y = grid_y[:, None] + GHOST_DIRECTIONS[:, 1]
+        inside = (cand_x >= 0) & (cand_x < self.width) & (cand_y >= 0) & (cand_y < self.height)
+        open_tile = self.walls[game_idx[:, None],
+                               np.clip(cand_y, 0, self.height - 1),
+                               np.clip(cand_x, 0, self.width - 1)] == 0
+        valid = inside & open_tile
+        any_valid = valid.any(axis=1)
+
+        # Maze distances to Pacman from the (refreshed if stale) flow fields
+        self.refresh_flow_fields(np.unique(game_idx), pacman_tile_x, pacman_tile_y)
+        flow = self.flow_distance
+        cand_distance = flow[game_idx[:, None],
+                             np.clip(cand_y, 0, self.height - 1),
+                             np.clip(cand_x, 0, self.width - 1)]
+        current_distance = flow[game_idx, grid_y, grid_x]
+
+        # Random valid direction: highest random score among the valid ones
+        scores = np.where(valid, self.rng.random(valid.shape), -1.0)
+        choice = scores.argmax(axis=1)
+
+        # Vulnerable ghosts run to the farthest neighbour (first one wins ties)
+        flee_distance = np.where(valid, cand_distance, -1)
+        flee_choice = flee_distance.argmax(axis=1)
+        vulnerable = self.ghost_vulnerable[game_idx]
+        flee = vulnerable & (flee_distance.max(axis=1) > 0)
+        choice = np.where(flee, flee_choice, choice)
+
+        # Otherwise sometimes chase Pacman when close
+        chase_distance = np.where(valid, cand_distance, UNREACHABLE)
+        chase_choice = chase_distance.argmin(axis=1)
+        chase = (~vulnerable & (current_distance < 5) & (self.rng.random(game_idx.size) < 0.3) &
+                 (chase_distance.min(axis=1) < UNREACHABLE))
+        choice = np.where(chase, chase_choice, choice)
+
+        directions = GHOST_DIRECTIONS[choice]
+        directions[~any_valid] = 0
+        self.ghost_direction[game_idx, slot_idx] = directions
+
+    def refresh_flow_fields(self, games, pacman_tile_x, pacman_tile_y):
+        """Vectorized BFS from Pacman's tile for the given games whose field is stale"""
+        target_x = pacman_tile_x[games]
+        target_y = pacman_tile_y[games]
+        stale = (self.flow_target[games, 0] != target_x) | (self.flow_target[games, 1] != target_y)
+        games = games[stale]
+        if games.size == 0:
+            return
+        target_x = target_x[stale]
+        target_y = target_y[stale]
+        self.flow_target[games, 0] = target_x
+        self.flow_target[games, 1] = target_y
+
+        # Work on arrays padded with a wall border so shifts never wrap
+        k = games.size
+        open_tiles = np.zeros((k, self.height + 2, self.width + 2), dtype=bool)
+        open_tiles[:, 1:-1, 1:-1] = self.walls[games] == 0
+        distance = np.full(open_tiles.shape, UNREACHABLE, dtype=np.int32)
+        frontier = np.zeros(open_tiles.shape, dtype=bool)
+        rows = np.arange(k)
+        distance[rows, target_y + 1, target_x + 1] = 0
+        frontier[rows, target_y + 1, target_x + 1] = True
+        unvisited = open_tiles & (distance == UNREACHABLE)
+
+        step = 0
+        while True:
+            step += 1
+            reached = np.zeros_like(frontier)
+            reached[:, 1:, :] |= frontier[:, :-1, :]
+            reached[:, :-1, :] |= frontier[:, 1:, :]
+            reached[:, :, 1:] |= frontier[:, :, :-1]
+            reached[:, :, :-1] |= frontier[:, :, 1:]
+            reached &= unvisited
+            if not reached.any():
+                break
+            distance[reached] = step
+            unvisited &= ~reached
+            frontier = reached
+
+        self.flow_distance[games] = distance[:, 1:-1, 1:-1]
+
+    def collect_pellets(self, playing, pacman_tile_x, pacman_tile_y):
+        """Vectorized pellet pickup at Pacman's tile"""
+        inside = ((pacman_tile_x >= 0) & (pacman_tile_x < self.width) &
+                  (pacman_tile_y >= 0) & (pacman_tile_y < self.height))
+        tile_x = np.clip(pacman_tile_x, 0, self.width - 1)
+        tile_y = np.clip(pacman_tile_y, 0, self.height - 1)
+        check = playing & inside
+
+        pellet = check & (self.pellets[self.games, tile_y, tile_x] != 0)
+        power = check & ~pellet & (self.power_pellets[self.games, tile_y, tile_x] != 0)
+
+        self.pellets[self.games[pellet], tile_y[pellet], tile_x[pellet]] = 0
+        self.power_pellets[self.games[power], tile_y[power], tile_x[power]] = 0
+        self.score += 10 * pellet + 50 * power
+        eaten = pellet | power
+        self.pellets_eaten += eaten
+        self.remaining_pellets -= eaten
+        self.power_mode[power] = True
+        self.power_timer[power] = 0
+
+    def check_ghost_collisions(self, playing):
+        """Vectorized ghost-Pacman collision, handling one ghost per game per step"""
+        candidates = playing[:, None] & self.ghost_active & ~self.ghost_eaten
+        distance_sq = ((self.ghost_x - self.pacman_x[:, None]) ** 2 +
+                       (self.ghost_y - self.pacman_y[:, None]) ** 2)
+        touching = candidates & (distance_sq < self.collision_distance_sq)
+        hit = touching.any(axis=1)
+        if not hit.any():
+            return
+        first = touching.argmax(axis=1)
+
+        eat = hit & self.power_mode & self.ghost_vulnerable
+        self.ghost_eaten[self.games[eat], first[eat]] = True
+        self.score[eat] += 200
+        self.ghosts_eaten[eat] += 1
+
+        caught = hit & ~eat
+        self.lives[caught] -= 1
+        self.game_over |= caught & (self.lives <= 0)
+        respawn = caught & (self.lives > 0)
+        self.pacman_x[respawn] = self.start_x
+        self.pacman_y[respawn] = self.start_y
+        self.pacman_direction[respawn] = 0
+        self.pacman_next_direction[respawn] = 0
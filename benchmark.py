@@ -0,0 +1,258 @@
+"""
+Benchmarks for the engine's hot paths
+
+Runs offline with SDL's dummy video driver, so no window or display is
+needed. Each benchmark is measured for a range of map sizes, ghost counts
+or snake lengths; results (ops/sec and peak traced memory) are written as
+JSON and can be compared against a stored baseline to flag regressions.
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --baseline baseline.json
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import pygame
+from constants import TILE_SIZE, FPS, VIEW_WIDTH, VIEW_HEIGHT, RED
+from game import Game
+from ghosts import Ghost
+from headless import HeadlessRunner, RandomInput
+from levels import LevelGenerator
+import snake_game
+
+
+MAP_SIZES = [15, 64, 256]
+GHOST_COUNTS = [4, 16, 64, 256]
+SNAKE_LENGTHS = [3, 100, 600]
+SNAKE_STEP_LENGTHS = [3, 1000, 39000]  # On a 200x200 board
+
+
+def playing_game(size, ghosts=None, seed=0):
+    """A seeded game a few seconds in, optionally with its ghosts replaced by a given number"""
+    game = Game(size, size, seed)
+    if ghosts is not None:
+        rng = random.Random(seed)
+        open_tiles = [(x, y) for y in range(1, size - 1) for x in range(1, size - 1) if not game.walls[y][x]]
+        game.ghosts = [Ghost(x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2, RED, f"Ghost {i}", game.map_rng)
+                       for i, (x, y) in enumerate(rng.sample(open_tiles, min(ghosts, len(open_tiles))))]
+        game.rebuild_ghost_index()
+        game.ai.reset(game.ghosts)
+        # Enough lives that crowded maps don't end the game and leave nothing to update
+        game.pacman.lives = 1000000
+    HeadlessRunner(game, input_source=RandomInput(seed=seed)).run(3 * FPS)
+    return game
+
+
+def bench_game_update(size, ghosts):
+    game = playing_game(size, ghosts)
+    game.pacman.lives = 1000000
+    snapshot = game.snapshot()
+    dt = 1.0 / FPS
+    count = [0]
+
+    def op():
+        # Rewind now and then so the benchmark keeps measuring a game in progress
+        count[0] += 1
+        if count[0] % 600 == 0:
+            game.restore(snapshot)
+        game.update(dt)
+    return op
+
+
+def bench_game_draw(size):
+    game = playing_game(size)
+    screen = pygame.display.set_mode((min(size, VIEW_WIDTH) * TILE_SIZE, min(size, VIEW_HEIGHT) * TILE_SIZE))
+    game.draw(screen)
+
+    def op():
+        game.draw(screen)
+    return op
+
+
+def bench_generate_map(size, level):
+    generator = LevelGenerator(size, size, random.Random(0))
+
+    def op():
+        generator.generate_map(level)
+    return op
+
+
+def bench_choose_new_direction(size, ghosts):
+    game = playing_game(size, ghosts)
+    game.flow_field.update(game.pacman.get_grid_position())
+    power_mode = game.pacman.power_mode
+
+    def op():
+        for ghost in game.ghosts:
+            ghost.choose_new_direction(game.flow_field, power_mode)
+    return op
+
+
+def cycle_path(width, height):
+    """A closed path through every cell of a grid with an even height
+
+    Rows are covered in alternating directions from column 1 onwards, and
+    column 0 leads back up to the start, so the last cell touches the first.
+    """
+    path = []
+    for y in range(height):
+        row = range(1, width) if y % 2 == 0 else reversed(range(1, width))
+        path.extend((x, y) for x in row)
+    path.extend((0, y) for y in reversed(range(height)))
+    return path
+
+
+def bench_snake_check_collision(length):
+    snake = snake_game.Snake()
+    # Lay the body out along the path, head last
+    path = cycle_path(snake_game.GRID_WIDTH, snake_game.GRID_HEIGHT)
+    snake.set_body(reversed(path[:length]))
+
+    def op():
+        snake.check_collision()
+    return op
+
+
+def bench_snake_step(length, size=200):
+    """One tick of a long snake on a large board: move, collision check and food respawn"""
+    snake = snake_game.Snake(size, size)
+    food = snake_game.Food(size, size, random.Random(0))
+    path = cycle_path(size, size)
+    snake.set_body(reversed(path[:length]))
+    position = [length - 1]  # Index of the head in path
+
+    def op():
+        # Go round the closed path, which never runs into the body
+        i = (position[0] + 1) % len(path)
+        (x, y), (head_x, head_y) = path[i], snake.body[0]
+        snake.direction = (x - head_x, y - head_y)
+        snake.move()
+        snake.check_collision()
+        food.respawn(snake)
+        position[0] = i
+    return op
+
+
+# (name, setup function, list of parameter dicts)
+BENCHMARKS = [
+    ("game_update", bench_game_update,
+     [{"size": size, "ghosts": None} for size in MAP_SIZES] +
+     [{"size": 64, "ghosts": count} for count in GHOST_COUNTS]),
+    ("game_draw", bench_game_draw, [{"size": size} for size in MAP_SIZES]),
+    ("generate_map", bench_generate_map, [{"size": size, "level": level} for size in MAP_SIZES for level in (1, 2)]),
+    ("choose_new_direction", bench_choose_new_direction, [{"size": 64, "ghosts": count} for count in GHOST_COUNTS]),
+    ("snake_check_collision", bench_snake_check_collision, [{"length": length} for length in SNAKE_LENGTHS]),
+    ("snake_step", bench_snake_step, [{"length": length} for length in SNAKE_STEP_LENGTHS]),
+]
+
+
+def result_key(name, params):
+    return name + "[" + ",".join(f"{key}={value}" for key, value in sorted(params.items())) + "]"
+
+
+def measure(op, min_time, repeats):
+    """Best ops/sec over several timed runs, each at least min_time seconds long"""
+    op()  # Warm up caches
+    best = 0.0
+    for _ in range(repeats):
+        count = 0
+        batch = 1
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                op()
+            count += batch
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            batch *= 2
+        best = max(best, count / elapsed)
+    return best
+
+
+def measure_memory(setup, params, ops=20):
+    """Peak traced allocation in KB while setting up and running a few ops"""
+    tracemalloc.start()
+    try:
+        op = setup(**params)
+        for _ in range(ops):
+            op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024.0
+
+
+def run_benchmarks(only=None, min_time=0.2, repeats=3):
+    results = {}
+    for name, setup, param_sets in BENCHMARKS:
+        if only and name not in only:
+            continue
+        for params in param_sets:
+            key = result_key(name, params)
+            ops_per_sec = measure(setup(**params), min_time, repeats)
+            peak_kb = measure_memory(setup, params)
+            results[key] = {"name": name, "params": params, "ops_per_sec": ops_per_sec, "peak_kb": peak_kb}
+            print(f"{key:<52} {ops_per_sec:>14,.0f} ops/s {peak_kb:>12,.0f} KB")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the keys that got more than threshold (a fraction) slower than the baseline"""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1.0
+        flag = ""
+        if change < -threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<52} {old['ops_per_sec']:>14,.0f} -> {result['ops_per_sec']:>14,.0f} ({change:+.0%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine's hot paths")
+    parser.add_argument("--only", nargs="+", choices=[name for name, _, _ in BENCHMARKS], help="benchmarks to run")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per case (the best is kept)")
+    parser.add_argument("--save", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown fraction reported as a regression")
+    args = parser.parse_args()
+
+    pygame.init()
+    results = run_benchmarks(args.only, args.min_time, args.repeats)
+    pygame.quit()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "pygame": pygame.version.ver,
+                       "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
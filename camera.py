@@ -0,0 +1,46 @@
+"""
+Scrolling camera that follows Pacman around maps larger than the screen
+"""
+
+import pygame
+from constants import TILE_SIZE
+
+
+class Camera:
+    """A screen-sized window onto the world, in pixels
+
+    (x, y) is the world position of the screen's top-left corner. It is kept
+    inside the map, so on maps that fit on screen the camera never moves.
+    """
+
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0
+        self.y = 0
+
+    def follow(self, target_x, target_y):
+        """Center the view on a world position; return True if the view moved"""
+        x = int(target_x) - self.view_width // 2
+        y = int(target_y) - self.view_height // 2
+        x = max(0, min(x, self.world_width - self.view_width))
+        y = max(0, min(y, self.world_height - self.view_height))
+        moved = x != self.x or y != self.y
+        self.x = x
+        self.y = y
+        return moved
+
+    @property
+    def offset(self):
+        return (self.x, self.y)
+
+    def world_rect(self):
+        """The part of the world currently on screen"""
+        return pygame.Rect(self.x, self.y, self.view_width, self.view_height)
+
+    def sees(self, x, y, margin=TILE_SIZE):
+        """Whether something at world position (x, y) is on screen, give or take margin"""
+        return (self.x - margin <= x < self.x + self.view_width + margin and
+                self.y - margin <= y < self.y + self.view_height + margin)
@@ -8,7 +8,25 @@ MAP_WIDTH = 15
 MAP_HEIGHT = 15
 SCREEN_WIDTH = MAP_WIDTH * TILE_SIZE
 SCREEN_HEIGHT = MAP_HEIGHT * TILE_SIZE
-FPS = 60
+FPS = 60  # Simulation steps per second (and the default render rate)
+
+# Game.update splits longer time steps into steps of at most MAX_UPDATE_STEP
+# seconds, so fast actors can't jump over a wall tile or each other; the
+# main loop catches up at most MAX_FRAME_TIME seconds after a stall
+MAX_UPDATE_STEP = 1.0 / 30
+MAX_FRAME_TIME = 0.25
+
+# Actor positions are fixed-point integers with SUBPIXELS units per pixel
+# (chosen so speeds at 60 steps per second are whole units per step)
+SUBPIXELS = 240
+TILE_UNITS = TILE_SIZE * SUBPIXELS
+
+# Large maps: the screen shows at most VIEW_WIDTH x VIEW_HEIGHT tiles and
+# scrolls with Pacman; ghost path searches stop NAVIGATION_HORIZON tiles out
+VIEW_WIDTH = 25
+VIEW_HEIGHT = 20
+LARGE_MAP_TILES = 64 * 64
+NAVIGATION_HORIZON = 48
 
 # Colors
 BLACK = (0, 0, 0)
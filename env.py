@@ -0,0 +1,131 @@
+"""
+Gym-style environment wrapping game.Game for training agents
+
+Observations are a (channels, height, width) uint8 array built straight
+from the engine's state without drawing anything:
+
+    0 walls, 1 pellets, 2 power pellets, 3 Pacman, 4 ghosts, 5 vulnerable ghosts
+
+The API follows Gymnasium (reset returns (observation, info), step returns
+(observation, reward, terminated, truncated, info)) without depending on it.
+"""
+
+import numpy as np
+from constants import FPS, MAP_WIDTH, MAP_HEIGHT
+from game import Game
+from pellets import PELLET, POWER_PELLET
+
+
+# Action codes accepted by step(), the same as batched.BatchedGame: 0 keeps the current input
+ACTIONS = [None, (-1, 0), (1, 0), (0, -1), (0, 1)]
+
+CHANNELS = ("walls", "pellets", "power_pellets", "pacman", "ghosts", "vulnerable_ghosts")
+WALLS, PELLETS, POWER_PELLETS, PACMAN, GHOSTS, VULNERABLE_GHOSTS = range(len(CHANNELS))
+
+
+class PacmanEnv:
+    """One game stepped at a fixed dt, observed through NumPy arrays
+
+    The observation array is allocated once and updated in place every step,
+    so keep a copy if you need an older observation. pellet_kinds is a
+    zero-copy view of the game's PelletStore bytes (EMPTY/PELLET/POWER_PELLET
+    per tile); the pellet channels are derived from it with vectorized
+    comparisons and the walls channel is only rebuilt when the map changes.
+    Actor channels are updated by clearing and setting single tiles.
+    """
+
+    def __init__(self, width=MAP_WIDTH, height=MAP_HEIGHT, dt=1.0 / FPS, frame_skip=1, max_steps=None):
+        self.width = width
+        self.height = height
+        self.dt = dt
+        self.frame_skip = frame_skip  # Game updates per step, repeating the action's effect
+        self.max_steps = max_steps  # Episodes past this many steps are truncated
+        self.observation = np.zeros((len(CHANNELS), height, width), dtype=np.uint8)
+        self.game = None
+        self.pellet_kinds = None
+        self.steps = 0
+        self.last_score = 0
+        self.pacman = None  # The Pacman whose score last_score was read from
+        self.map_walls = None  # The walls the walls channel was built from
+        self.map_pellets = None  # The PelletStore that pellet_kinds is a view of
+        self.actor_tiles = []  # (channel, y, x) set in the observation last update
+
+    def reset(self, seed=None):
+        """Start a new game and return (observation, info)"""
+        self.game = Game(self.width, self.height, seed)
+        self.steps = 0
+        self.pacman = self.game.pacman
+        self.last_score = self.pacman.score
+        return self.observe(), self.info()
+
+    def step(self, action):
+        """Apply an action code (or direction tuple) and advance the game
+
+        Returns (observation, reward, terminated, truncated, info), where the
+        reward is the change in score and the episode terminates on game over
+        or on winning. A new map brings a new Pacman starting from 0 points,
+        so the points scored on the old map are added up before switching.
+        """
+        game = self.game
+        if isinstance(action, tuple):
+            game.apply_action(action)
+        elif action:
+            game.apply_action(ACTIONS[action])
+        reward = 0
+        for _ in range(self.frame_skip):
+            game.update(self.dt)
+            if game.pacman is not self.pacman:
+                reward += self.pacman.score - self.last_score
+                self.pacman = game.pacman
+                self.last_score = 0
+            if game.game_over or game.win:
+                break
+        self.steps += 1
+
+        score = self.pacman.score
+        reward += score - self.last_score
+        self.last_score = score
+        terminated = game.game_over or game.win
+        truncated = not terminated and self.max_steps is not None and self.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def observe(self):
+        """Bring the observation array up to date with the game and return it"""
+        game = self.game
+        obs = self.observation
+        if game.walls is not self.map_walls:
+            # Walls only change with the map
+            self.map_walls = game.walls
+            obs[WALLS] = np.asarray(game.walls, dtype=np.uint8)
+        if game.pellets is not self.map_pellets:
+            # View the new map's pellet bytes in place; nothing is copied
+            self.map_pellets = game.pellets
+            self.pellet_kinds = np.frombuffer(game.pellets.kinds, dtype=np.uint8).reshape(self.height, self.width)
+        np.equal(self.pellet_kinds, PELLET, out=obs[PELLETS].view(np.bool_))
+        np.equal(self.pellet_kinds, POWER_PELLET, out=obs[POWER_PELLETS].view(np.bool_))
+
+        for channel, y, x in self.actor_tiles:
+            obs[channel, y, x] = 0
+        tiles = []
+        x, y = game.pacman.get_grid_position()
+        if 0 <= x < self.width and 0 <= y < self.height:
+            tiles.append((PACMAN, y, x))
+        for ghost in game.ghosts:
+            if ghost.eaten:
+                continue
+            x, y = ghost.get_grid_position()
+            if 0 <= x < self.width and 0 <= y < self.height:
+                tiles.append((VULNERABLE_GHOSTS if ghost.vulnerable else GHOSTS, y, x))
+        for channel, y, x in tiles:
+            obs[channel, y, x] = 1
+        self.actor_tiles = tiles
+        return obs
+
+    def info(self):
+        game = self.game
+        return {
+            "score": game.pacman.score,
+            "lives": game.pacman.lives,
+            "level": game.level,
+            "pellets_remaining": game.pellets.remaining,
+        }
@@ -0,0 +1,251 @@
+"""
+Multi-process evaluation of policies over many seeded headless episodes
+
+Every (seed, level, policy) combination is one episode. Episodes are
+grouped into fixed shards that run on a process pool; each finished shard
+is written to its own JSON-lines file, so an interrupted run picks up
+where it left off and only runs the shards that are missing.
+
+    python evaluation.py --seeds 10000 --levels 1 2 --policies random idle --out eval-run
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from constants import FPS, MAP_WIDTH, MAP_HEIGHT
+from game import Game
+from headless import RandomInput, apply_input
+from autopilot import Autopilot
+
+
+def idle_policy(seed):
+    return None
+
+
+def random_policy(seed):
+    return RandomInput(seed=seed)
+
+
+def autopilot_policy(seed):
+    # A rollout budget rather than a time budget, so episodes are reproducible
+    return Autopilot(time_budget=None, max_rollouts=32, seed=seed)
+
+
+# Policy name -> factory(seed) returning a headless input source (or None to stay idle)
+POLICIES = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "autopilot": autopilot_policy,
+}
+
+METRICS = ["score", "pellets_eaten", "ghosts_eaten", "lives_lost", "ticks"]
+
+
+def run_episode(seed, level, policy, max_ticks, dt=1.0 / FPS, width=MAP_WIDTH, height=MAP_HEIGHT):
+    """Play one seeded episode from the given level until it ends or max_ticks pass
+
+    Pacman and the per-map counters are replaced when a new level starts,
+    so their totals are added up every time the map changes.
+    """
+    game = Game(width, height, seed)
+    if level != game.level:
+        game.level = level
+        game.generate_map()
+    input_source = POLICIES[policy](seed)
+
+    totals = {"score": 0, "pellets_eaten": 0, "ghosts_eaten": 0, "lives_lost": 0}
+    pacman = game.pacman
+    start_lives = pacman.lives
+    pellets_eaten = 0
+    ticks = 0
+    while ticks < max_ticks and not game.game_over and not game.win:
+        if input_source is not None:
+            apply_input(game, input_source(game, ticks))
+        game.update(dt)
+        ticks += 1
+        if game.pacman is not pacman:
+            totals["score"] += pacman.score
+            totals["pellets_eaten"] += pellets_eaten
+            totals["ghosts_eaten"] += pacman.ghosts_eaten
+            totals["lives_lost"] += start_lives - pacman.lives
+            pacman = game.pacman
+            start_lives = pacman.lives
+        pellets_eaten = game.pellets_eaten
+
+    return {
+        "seed": seed,
+        "level": level,
+        "policy": policy,
+        "score": totals["score"] + pacman.score,
+        "pellets_eaten": totals["pellets_eaten"] + game.pellets_eaten,
+        "ghosts_eaten": totals["ghosts_eaten"] + pacman.ghosts_eaten,
+        "lives_lost": totals["lives_lost"] + start_lives - pacman.lives,
+        "ticks": ticks,
+        "final_level": game.level,
+        "game_over": game.game_over,
+        "win": game.win,
+    }
+
+
+def run_shard(path, jobs, max_ticks):
+    """Run a shard of (seed, level, policy) jobs and write its results to path"""
+    lines = [json.dumps(run_episode(seed, level, policy, max_ticks)) for seed, level, policy in jobs]
+    # Write under a temporary name first so a killed worker never leaves a partial shard behind
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp_path, path)
+    return path, len(jobs)
+
+
+def make_jobs(seeds, levels, policies):
+    return list(product(seeds, levels, policies))
+
+
+def shard_path(out_dir, index):
+    return os.path.join(out_dir, f"shard-{index:05d}.jsonl")
+
+
+class EvaluationRunner:
+    """Splits the jobs into shards and runs the missing ones on a process pool
+
+    The shard layout is fixed by the job list and shard size, which are
+    saved in a manifest next to the shards; resuming with different
+    settings is refused instead of mixing results.
+    """
+
+    def __init__(self, out_dir, seeds, levels, policies, max_ticks, shard_size=50, workers=None):
+        self.out_dir = out_dir
+        self.jobs = make_jobs(seeds, levels, policies)
+        self.max_ticks = max_ticks
+        self.shard_size = shard_size
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest = {
+            "seeds": list(seeds),
+            "levels": list(levels),
+            "policies": list(policies),
+            "max_ticks": max_ticks,
+            "shard_size": shard_size,
+        }
+
+    def shards(self):
+        """Yield (index, jobs) for every shard"""
+        for index, start in enumerate(range(0, len(self.jobs), self.shard_size)):
+            yield index, self.jobs[start:start + self.shard_size]
+
+    def check_manifest(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, "manifest.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                if json.load(f) != self.manifest:
+                    raise ValueError(f"{self.out_dir} holds results for different settings")
+        else:
+            with open(path, "w") as f:
+                json.dump(self.manifest, f)
+
+    def run(self, progress=None):
+        """Run the shards that are not on disk yet; return (episodes run, episodes skipped)"""
+        self.check_manifest()
+        pending = []
+        skipped = 0
+        for index, jobs in self.shards():
+            path = shard_path(self.out_dir, index)
+            if os.path.exists(path):
+                skipped += len(jobs)
+            else:
+                pending.append((path, jobs))
+
+        done = 0
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(run_shard, path, jobs, self.max_ticks) for path, jobs in pending]
+                for future in as_completed(futures):
+                    _, count = future.result()
+                    done += count
+                    if progress:
+                        progress(done + skipped, len(self.jobs))
+        return done, skipped
+
+    def results(self):
+        """Yield every episode result written so far"""
+        for index, _ in self.shards():
+            path = shard_path(self.out_dir, index)
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def percentile(sorted_values, q):
+    """Linearly interpolated q-th percentile (0-100) of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def aggregate(results, percentiles=(5, 50, 95)):
+    """Summarize results per (policy, level): episode count, mean and percentiles of each metric"""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["policy"], result["level"]), []).append(result)
+
+    summary = {}
+    for key in sorted(groups):
+        episodes = groups[key]
+        stats = {"episodes": len(episodes), "wins": sum(1 for e in episodes if e["win"])}
+        for metric in METRICS:
+            values = sorted(e[metric] for e in episodes)
+            stats[metric] = {"mean": sum(values) / len(values)}
+            for q in percentiles:
+                stats[metric][f"p{q}"] = percentile(values, q)
+        summary[key] = stats
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate policies over many seeded headless episodes")
+    parser.add_argument("--out", required=True, help="directory for shard results (reused to resume)")
+    parser.add_argument("--seeds", type=int, default=1000, help="number of seeds to run")
+    parser.add_argument("--first-seed", type=int, default=0, help="first seed")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1], help="starting levels")
+    parser.add_argument("--policies", nargs="+", default=["random"], choices=sorted(POLICIES), help="policies")
+    parser.add_argument("--max-ticks", type=int, default=60 * FPS * 5, help="tick limit per episode")
+    parser.add_argument("--shard-size", type=int, default=50, help="episodes per shard")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    runner = EvaluationRunner(args.out, seeds, args.levels, args.policies, args.max_ticks,
+                              args.shard_size, args.workers)
+
+    def progress(finished, total):
+        print(f"\r{finished}/{total} episodes", end="", flush=True)
+
+    start = time.perf_counter()
+    done, skipped = runner.run(progress)
+    elapsed = time.perf_counter() - start
+    print()
+    print(f"Ran {done} episodes in {elapsed:.1f}s with {runner.workers} workers"
+          + (f" ({done / elapsed:.1f}/s)" if done and elapsed > 0 else "")
+          + (f", {skipped} already done" if skipped else ""))
+
+    for (policy, level), stats in aggregate(runner.results()).items():
+        print(f"{policy} / level {level}: {stats['episodes']} episodes, {stats['wins']} wins")
+        for metric in METRICS:
+            values = stats[metric]
+            print(f"  {metric:>14}: mean {values['mean']:9.1f}  p5 {values['p5']:9.1f}  "
+                  f"p50 {values['p50']:9.1f}  p95 {values['p95']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,54 @@
 Main Game class that manages the game state and logic
 """
 
-import pygame
 import math
+import pygame
+import random
 from constants import *
 from pacman import Pacman
-from levels import LevelGenerator
+from prefetch import MapPrefetcher, PreparedMap
+from pellets import PELLET, POWER_PELLET
+from navigation import FlowField
+from spatial import SpatialHash
+from maze_layer import MazeLayer
+from hud import TextCache
+from sprites import SpriteAtlas
+from camera import Camera
+from snapshot import GameSnapshot
+from scheduler import AIScheduler
 
 
 class Game:
-    def __init__(self):
-        self.level_generator = LevelGenerator()
+    def __init__(self, width=MAP_WIDTH, height=MAP_HEIGHT, seed=None, prefetch=False, level_files=None):
+        # Size in tiles of generated maps; maps larger than the screen scroll with a camera
+        self.map_width = width
+        self.map_height = height
+        # Size of the current map, which differs from the above while a level file is played
+        self.width = width
+        self.height = height
+        # Optional level -> level file path; those levels are loaded instead of
+        # generated, and take their size from the file
+        self.level_files = level_files or {}
+        self.start = (width // 2, height // 2)  # Pacman's start tile on the current map
+        # Every random decision (maps, ghost spawns, ghost AI) derives from this
+        # generator, so a seed plus the inputs reproduces a whole game. Each
+        # map gets its own generator seeded from map_seed and the map's index
+        # (see PreparedMap), so it can be built ahead of time.
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.map_seed = self.rng.getrandbits(64)
+        self.map_index = 0  # Maps generated so far
+        self.map_rng = None  # The current map's generator, shared with its ghosts
+        # With prefetch on, upcoming maps are built on a worker thread while this one is played
+        self.prefetcher = MapPrefetcher(width, height, self.map_seed, self.level_files) if prefetch else None
         self.walls = []
-        self.pellets = []
-        self.power_pellets = []
+        self.pellets = None  # PelletStore for the current map
+        self.navigator = None  # MazeNavigator for the current map
+        self.flow_field = None  # Maze distances to Pacman shared by all ghosts
         self.pacman = None
         self.ghosts = []
+        self.ghost_index = SpatialHash()  # Uneaten ghosts bucketed by tile
+        self.ai = AIScheduler()  # Staggers ghost decisions and caps them per step
         self.total_pellets = 0
         self.pellets_eaten = 0  # Track how many pellets have been eaten
         self.game_over = False
@@ -28,24 +61,43 @@ class Game:
         self.level_complete_message = ""
         self.level_complete_timer = 0
         self.level_complete_duration = 3.0  # Show level complete message for 3 seconds
+        self.maze_layer = None  # Built lazily on the first draw of each map
+        self.camera = None  # Created on the first draw, sized to the screen
+        self.dirty_rects = []  # Screen areas drawn over last frame
+        self.text_cache = TextCache()
+        self.sprites = None  # SpriteAtlas, built on the first draw
+        self.profiler = None  # Optional FrameProfiler timing each phase of update()
         self.generate_map()
     
     def generate_map(self):
         """Generate a map layout based on current level"""
-        # Generate the map using the level generator
-        self.walls, self.pellets, self.power_pellets = self.level_generator.generate_map(self.level)
+        # Take the map from the prefetcher if it was built in the background, or build it now
+        if self.prefetcher is not None:
+            prepared = self.prefetcher.take(self.map_index, self.level)
+        else:
+            prepared = PreparedMap(self.level, self.map_index, self.map_width, self.map_height, self.map_seed,
+                                   self.level_files.get(self.level))
+        self.map_index += 1
+        self.walls, self.pellets, self.navigator = prepared.walls, prepared.pellets, prepared.navigator
+        self.map_rng = prepared.rng
+        self.width, self.height = prepared.width, prepared.height
+        self.start = prepared.start
+        
+        # Place Pacman at the start (the center, unless a level file says otherwise)
+        start_x, start_y = self.start
+        self.pacman = Pacman(start_x * TILE_SIZE + TILE_SIZE // 2, 
+                            start_y * TILE_SIZE + TILE_SIZE // 2)
         
-        # Place Pacman in the center
-        center_x = MAP_WIDTH // 2
-        center_y = MAP_HEIGHT // 2
-        self.pacman = Pacman(center_x * TILE_SIZE + TILE_SIZE // 2, 
-                            center_y * TILE_SIZE + TILE_SIZE // 2)
+        # One flow field per map, refreshed as Pacman moves between tiles
+        self.flow_field = FlowField(self.navigator)
         
-        # Create ghosts based on level
-        self.ghosts = self.level_generator.create_ghosts(self.level, center_x, center_y)
+        # Ghosts for this level were placed along with the map
+        self.ghosts = prepared.ghosts
+        self.rebuild_ghost_index()
+        self.ai.reset(self.ghosts)
         
         # Count total pellets
-        self.total_pellets = sum(sum(row) for row in self.pellets) + sum(sum(row) for row in self.power_pellets)
+        self.total_pellets = self.pellets.remaining
         
         # Reset game state
         self.game_over = False
@@ -57,6 +109,35 @@ class Game:
         self.pellets_eaten = 0
         if self.pacman:
             self.pacman.ghosts_eaten = 0
+        
+        # Start on the maps the next level or a restart would need
+        if self.prefetcher is not None:
+            if self.level < 2:  # Only 2 levels for now
+                self.prefetcher.prefetch(self.map_index, self.level + 1)
+            self.prefetcher.prefetch(self.map_index, 1)
+    
+    def close(self):
+        """Stop background map generation, if any"""
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+    
+    def rebuild_ghost_index(self):
+        """Index the uneaten ghosts from scratch, in list order"""
+        self.ghost_index = SpatialHash()
+        for ghost in self.ghosts:
+            if not ghost.eaten:
+                self.ghost_index.insert(ghost)
+    
+    def snapshot(self, include_rng=True):
+        """Capture the game state in a compact GameSnapshot
+
+        Leave out the RNG state only if the caller reseeds the game itself.
+        """
+        return GameSnapshot(self, include_rng)
+    
+    def restore(self, snapshot):
+        """Put the game back to the state captured by snapshot()"""
+        snapshot.restore(self)
     
     def can_skip_level(self):
         """Check if player can skip to next level (half pellets eaten + 2 ghosts eaten)"""
@@ -74,8 +155,48 @@ class Game:
         else:
             # If already at max level, just win
             self.win = True
-    
+
+    def apply_action(self, action):
+        """Apply a player action: a direction tuple, "skip" or "restart"
+
+        This is the single input path shared by the keyboard loop in main.py
+        and by headless input sources.
+        """
+        if action == "restart":
+            if self.game_over or self.win:
+                self.level = 1
+                self.generate_map()
+        elif action == "skip":
+            if not self.game_over and not self.win and self.can_skip_level():
+                self.skip_to_next_level()
+        elif action is not None:
+            # Movement controls only work during gameplay
+            if not self.game_over and not self.win:
+                self.pacman.next_direction = action
+
     def update(self, dt):
+        """Advance the game by dt seconds
+
+        Steps longer than MAX_UPDATE_STEP are split into equal sub-steps, so
+        a long frame can't carry Pacman or a ghost past a wall tile or past
+        each other. Positions before the update are kept for interpolated drawing.
+        """
+        pacman = self.pacman
+        pacman.prev_fx, pacman.prev_fy = pacman.fx, pacman.fy
+        for ghost in self.ghosts:
+            ghost.prev_fx, ghost.prev_fy = ghost.fx, ghost.fy
+        
+        steps = 1
+        if dt > MAX_UPDATE_STEP:
+            steps = math.ceil(dt / MAX_UPDATE_STEP)
+            dt /= steps
+        for _ in range(steps):
+            self.step(dt)
+    
+    def step(self, dt):
+        """Advance the game by one step of at most MAX_UPDATE_STEP seconds"""
+        profiler = self.profiler
+        
         # Update life lost message timer
         if self.life_lost_message:
             self.life_lost_timer += dt
@@ -92,117 +213,163 @@ class Game:
                 # Advance to next level
                 self.level += 1
                 self.generate_map()
+        if profiler is not None:
+            profiler.lap("messages")
         
         if not self.game_over and not self.win:
             # Update Pacman
             self.pacman.update(dt, self.walls)
+            if profiler is not None:
+                profiler.lap("pacman")
             
-            # Update ghosts
-            pacman_grid_pos = self.pacman.get_grid_position()
+            # Update ghosts (the flow field only recomputes when Pacman changes tile);
+            # decisions deferred from earlier steps are served first
+            self.flow_field.update(self.pacman.get_grid_position())
+            self.ai.begin_step(self.flow_field, self.pacman.power_mode)
             for ghost in self.ghosts:
-                ghost.update(dt, self.walls, pacman_grid_pos, self.pacman.power_mode)
+                ghost.update(dt, self.walls, self.flow_field, self.pacman.power_mode, self.ai)
+                self.ghost_index.move(ghost)
+            if profiler is not None:
+                profiler.lap("ghosts")
             
             # Check pellet collection
             grid_x, grid_y = self.pacman.get_grid_position()
-            if (0 <= grid_x < MAP_WIDTH and 0 <= grid_y < MAP_HEIGHT):
-                if self.pellets[grid_y][grid_x]:
-                    self.pellets[grid_y][grid_x] = False
+            if (0 <= grid_x < self.width and 0 <= grid_y < self.height):
+                kind = self.pellets.eat(grid_x, grid_y)
+                if kind == PELLET:
                     self.pacman.score += 10
                     self.pellets_eaten += 1
-                elif self.power_pellets[grid_y][grid_x]:
-                    self.power_pellets[grid_y][grid_x] = False
+                elif kind == POWER_PELLET:
                     self.pacman.score += 50
                     self.pacman.power_mode = True
                     self.pacman.power_timer = 0  # Reset timer
                     self.pellets_eaten += 1
+            if profiler is not None:
+                profiler.lap("pellets")
             
-            # Check ghost-Pacman collision
-            for ghost in self.ghosts:
-                if not ghost.eaten:  # Only check collision with non-eaten ghosts
-                    distance = math.sqrt((self.pacman.x - ghost.x)**2 + (self.pacman.y - ghost.y)**2)
-                    if distance < (self.pacman.radius + ghost.radius):
-                        # Collision detected
-                        if self.pacman.power_mode and ghost.vulnerable:
-                            # Pacman eats the ghost
-                            ghost.eaten = True
-                            self.pacman.score += 200
-                            self.pacman.ghosts_eaten += 1
-                            self.life_lost_message = f"GHOST EATEN! +200 points (Total: {self.pacman.ghosts_eaten})"
-                            self.life_lost_timer = 0
+            # Check ghost-Pacman collision against the ghosts in neighbouring tiles only
+            # (eaten ghosts are removed from the index; ghost radii are under half a tile)
+            pacman = self.pacman
+            for ghost in self.ghost_index.query(pacman.x, pacman.y, pacman.radius + TILE_SIZE // 2):
+                dx = pacman.fx - ghost.fx
+                dy = pacman.fy - ghost.fy
+                reach = (pacman.radius + ghost.radius) * SUBPIXELS
+                if dx * dx + dy * dy < reach * reach:
+                    # Collision detected
+                    if self.pacman.power_mode and ghost.vulnerable:
+                        # Pacman eats the ghost
+                        ghost.eaten = True
+                        self.ghost_index.remove(ghost)
+                        self.pacman.score += 200
+                        self.pacman.ghosts_eaten += 1
+                        self.life_lost_message = f"GHOST EATEN! +200 points (Total: {self.pacman.ghosts_eaten})"
+                        self.life_lost_timer = 0
+                    else:
+                        # Pacman loses a life
+                        self.pacman.lives -= 1
+                        if self.pacman.lives <= 0:
+                            self.game_over = True
+                            self.life_lost_message = "GAME OVER!"
                         else:
-                            # Pacman loses a life
-                            self.pacman.lives -= 1
-                            if self.pacman.lives <= 0:
-                                self.game_over = True
-                                self.life_lost_message = "GAME OVER!"
-                            else:
-                                # Show life lost message
-                                self.life_lost_message = f"LOST A LIFE! Lives remaining: {self.pacman.lives}"
-                                self.life_lost_timer = 0
-                                # Reset Pacman position to center
-                                center_x = MAP_WIDTH // 2
-                                center_y = MAP_HEIGHT // 2
-                                self.pacman.x = center_x * TILE_SIZE + TILE_SIZE // 2
-                                self.pacman.y = center_y * TILE_SIZE + TILE_SIZE // 2
-                                self.pacman.direction = (0, 0)
-                                self.pacman.next_direction = (0, 0)
-                        break  # Only handle one collision per frame
+                            # Show life lost message
+                            self.life_lost_message = f"LOST A LIFE! Lives remaining: {self.pacman.lives}"
+                            self.life_lost_timer = 0
+                            # Reset Pacman position to the start
+                            start_x, start_y = self.start
+                            self.pacman.x = start_x * TILE_SIZE + TILE_SIZE // 2
+                            self.pacman.y = start_y * TILE_SIZE + TILE_SIZE // 2
+                            # Jump straight there rather than drawing a slide across the map
+                            self.pacman.prev_fx, self.pacman.prev_fy = self.pacman.fx, self.pacman.fy
+                            self.pacman.direction = (0, 0)
+                            self.pacman.next_direction = (0, 0)
+                    break  # Only handle one collision per frame
+            if profiler is not None:
+                profiler.lap("collisions")
             
-            # Check level completion
-            remaining_pellets = sum(sum(row) for row in self.pellets) + sum(sum(row) for row in self.power_pellets)
-            if remaining_pellets == 0:
+            # Check level completion (only start the countdown once, so it can expire)
+            if self.pellets.remaining == 0 and not self.level_complete_message:
                 if self.level < 2:  # Only 2 levels for now
                     self.level_complete_message = f"LEVEL {self.level} COMPLETE! Next: Level {self.level + 1}"
                     self.level_complete_timer = 0
                 else:
                     self.win = True
+            if profiler is not None:
+                profiler.lap("completion")
     
-    def draw(self, screen):
-        # Draw background
-        screen.fill(BLACK)
-        
-        # Draw walls
-        for y in range(MAP_HEIGHT):
-            for x in range(MAP_WIDTH):
-                if self.walls[y][x]:
-                    rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                    pygame.draw.rect(screen, BLUE, rect)
-        
-        # Draw pellets
-        for y in range(MAP_HEIGHT):
-            for x in range(MAP_WIDTH):
-                if self.pellets[y][x]:
-                    center_x = x * TILE_SIZE + TILE_SIZE // 2
-                    center_y = y * TILE_SIZE + TILE_SIZE // 2
-                    pygame.draw.circle(screen, WHITE, (center_x, center_y), 3)
-                elif self.power_pellets[y][x]:
-                    center_x = x * TILE_SIZE + TILE_SIZE // 2
-                    center_y = y * TILE_SIZE + TILE_SIZE // 2
-                    pygame.draw.circle(screen, WHITE, (center_x, center_y), 8)  # Thicker power pellet
+    def draw(self, screen, alpha=1.0):
+        """Draw the frame and return the list of screen rects that changed
+
+        alpha (0 to 1) is how far the render time is between the previous
+        update and the latest one; actors and the camera are drawn that far
+        along, so motion stays smooth when rendering and updates don't line up.
+
+        The maze comes from a cached MazeLayer, and only the part under the
+        camera is ever drawn. While the camera is still, only the areas under
+        the previous frame's actors and HUD are restored before redrawing
+        them. Pass the result to pygame.display.update().
+        """
+        screen_width, screen_height = screen.get_size()
+        full_redraw = False
+        if self.maze_layer is None or self.maze_layer.pellets is not self.pellets:
+            self.maze_layer = MazeLayer(self.walls, self.pellets)
+            full_redraw = True
+        if (self.camera is None or self.camera.view_width != screen_width or
+                self.camera.view_height != screen_height or
+                self.camera.world_width != self.width * TILE_SIZE or
+                self.camera.world_height != self.height * TILE_SIZE):
+            self.camera = Camera(screen_width, screen_height, self.width * TILE_SIZE, self.height * TILE_SIZE)
+            full_redraw = True
+        if self.camera.follow(*self.pacman.render_position(alpha)):
+            full_redraw = True
+        offset_x, offset_y = offset = self.camera.offset
+        layer = self.maze_layer
+        changed_tiles = layer.sync()
+
+        if full_redraw:
+            layer.blit(screen, self.camera.world_rect(), offset)
+            changed_tiles = []
+        else:
+            # Restore the background under last frame's actors and HUD, and eaten pellets
+            for rect in self.dirty_rects:
+                layer.blit(screen, rect.move(offset_x, offset_y), offset)
+            view = self.camera.world_rect()
+            changed_tiles = [rect for rect in changed_tiles if rect.colliderect(view)]
+            for rect in changed_tiles:
+                layer.blit(screen, rect, offset)
+            changed_tiles = [rect.move(-offset_x, -offset_y) for rect in changed_tiles]
+
+        rects = []
+        if self.sprites is None:
+            self.sprites = SpriteAtlas()
         
         # Draw Pacman
         if self.pacman:
-            self.pacman.draw(screen)
+            rects.append(self.pacman.draw(screen, self.sprites, offset, alpha))
         
-        # Draw ghosts
+        # Draw the ghosts that are on screen (vulnerable ghosts flash between blue and white every 200ms)
+        flash = (pygame.time.get_ticks() // 200) % 2 == 1
         for ghost in self.ghosts:
-            ghost.draw(screen)
+            if not self.camera.sees(ghost.x, ghost.y):
+                continue
+            rect = ghost.draw(screen, self.sprites, flash, offset, alpha)
+            if rect:
+                rects.append(rect)
         
-        # Draw UI
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f"Score: {self.pacman.score}", True, WHITE)
-        screen.blit(score_text, (10, 10))
+        # Draw UI (text surfaces are cached, so unchanged strings are not re-rendered)
+        text_cache = self.text_cache
+        score_text = text_cache.render(f"Score: {self.pacman.score}", 36, WHITE)
+        rects.append(screen.blit(score_text, (10, 10)))
         
-        lives_text = font.render(f"Lives: {self.pacman.lives}", True, WHITE)
-        screen.blit(lives_text, (SCREEN_WIDTH - 120, 10))
+        lives_text = text_cache.render(f"Lives: {self.pacman.lives}", 36, WHITE)
+        rects.append(screen.blit(lives_text, (screen_width - 120, 10)))
         
-        level_text = font.render(f"Level: {self.level}", True, WHITE)
-        screen.blit(level_text, (SCREEN_WIDTH // 2 - 50, 10))
+        level_text = text_cache.render(f"Level: {self.level}", 36, WHITE)
+        rects.append(screen.blit(level_text, (screen_width // 2 - 50, 10)))
         
         # Power mode indicator
         if self.pacman.power_mode:
-            power_text = font.render("POWER MODE!", True, YELLOW)
-            screen.blit(power_text, (10, 50))
+            power_text = text_cache.render("POWER MODE!", 36, YELLOW)
+            rects.append(screen.blit(power_text, (10, 50)))
             
             # Power timer bar
             power_remaining = (self.pacman.power_duration - self.pacman.power_timer) / self.pacman.power_duration
@@ -212,40 +379,51 @@ class Game:
             bar_y = 80
             
             # Background bar
-            pygame.draw.rect(screen, WHITE, (bar_x, bar_y, bar_width, bar_height))
+            rects.append(pygame.draw.rect(screen, WHITE, (bar_x, bar_y, bar_width, bar_height)))
             # Power bar
-            pygame.draw.rect(screen, YELLOW, (bar_x, bar_y, bar_width * power_remaining, bar_height))
+            rects.append(pygame.draw.rect(screen, YELLOW, (bar_x, bar_y, bar_width * power_remaining, bar_height)))
         
         # Skip level indicator
         if self.can_skip_level():
-            skip_text = font.render("Press F to skip level!", True, GREEN)
-            screen.blit(skip_text, (10, 50 if not self.pacman.power_mode else 100))
+            skip_text = text_cache.render("Press F to skip level!", 36, GREEN)
+            rects.append(screen.blit(skip_text, (10, 50 if not self.pacman.power_mode else 100)))
         
         # Progress indicators
-        progress_text = font.render(f"Pellets: {self.pellets_eaten}/{self.total_pellets}", True, WHITE)
-        screen.blit(progress_text, (10, 130 if not self.pacman.power_mode else 180))
+        progress_text = text_cache.render(f"Pellets: {self.pellets_eaten}/{self.total_pellets}", 36, WHITE)
+        rects.append(screen.blit(progress_text, (10, 130 if not self.pacman.power_mode else 180)))
         
-        ghosts_text = font.render(f"Ghosts eaten: {self.pacman.ghosts_eaten}", True, WHITE)
-        screen.blit(ghosts_text, (10, 170 if not self.pacman.power_mode else 220))
+        ghosts_text = text_cache.render(f"Ghosts eaten: {self.pacman.ghosts_eaten}", 36, WHITE)
+        rects.append(screen.blit(ghosts_text, (10, 170 if not self.pacman.power_mode else 220)))
         
         # Draw life lost message
         if self.life_lost_message:
-            life_lost_text = font.render(self.life_lost_message, True, RED)
-            text_rect = life_lost_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            screen.blit(life_lost_text, text_rect)
+            life_lost_text = text_cache.render(self.life_lost_message, 36, RED)
+            text_rect = life_lost_text.get_rect(center=(screen_width//2, screen_height//2))
+            rects.append(screen.blit(life_lost_text, text_rect))
         
         # Draw level complete message
         if self.level_complete_message:
-            level_complete_text = font.render(self.level_complete_message, True, GREEN)
-            text_rect = level_complete_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            screen.blit(level_complete_text, text_rect)
+            level_complete_text = text_cache.render(self.level_complete_message, 36, GREEN)
+            text_rect = level_complete_text.get_rect(center=(screen_width//2, screen_height//2))
+            rects.append(screen.blit(level_complete_text, text_rect))
         
         # Draw game over/win messages
         if self.game_over:
-            game_over_text = font.render("GAME OVER - Press R to restart", True, WHITE)
-            text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 50))
-            screen.blit(game_over_text, text_rect)
+            game_over_text = text_cache.render("GAME OVER - Press R to restart", 36, WHITE)
+            text_rect = game_over_text.get_rect(center=(screen_width//2, screen_height//2 + 50))
+            rects.append(screen.blit(game_over_text, text_rect))
         elif self.win:
-            win_text = font.render("YOU WIN! - Press R to restart", True, GREEN)
-            text_rect = win_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            screen.blit(win_text, text_rect)
+            win_text = text_cache.render("YOU WIN! - Press R to restart", 36, GREEN)
+            text_rect = win_text.get_rect(center=(screen_width//2, screen_height//2))
+            rects.append(screen.blit(win_text, text_rect))
+
+        # Frame-time overlay (only when profiling)
+        if self.profiler is not None:
+            rects.extend(self.profiler.draw(screen, text_cache))
+
+        if full_redraw:
+            dirty = [screen.get_rect()]
+        else:
+            dirty = self.dirty_rects + changed_tiles + rects
+        self.dirty_rects = rects
+        return dirty
@@ -2,16 +2,15 @@
 Ghost characters class
 """
 
-import pygame
-import math
 import random
-from constants import TILE_SIZE, MAP_WIDTH, MAP_HEIGHT, BLUE, WHITE
+from constants import TILE_SIZE, SUBPIXELS, TILE_UNITS, BLUE, WHITE
 
 
 class Ghost:
-    def __init__(self, x, y, color, name):
-        self.x = x
-        self.y = y
+    def __init__(self, x, y, color, name, rng=None):
+        # Position in fixed-point units (SUBPIXELS per pixel), as for Pacman
+        self.fx = round(x * SUBPIXELS)
+        self.fy = round(y * SUBPIXELS)
         self.color = color
         self.name = name
         self.radius = TILE_SIZE // 2 - 3
@@ -24,8 +23,35 @@ class Ghost:
         self.vulnerable = False
         self.eaten = False
         self.original_color = color
+        self.rng = rng if rng is not None else random  # Shared with the game for reproducible runs
+        self.prev_fx = self.fx  # Position before the last game update, for interpolated drawing
+        self.prev_fy = self.fy
+        self.step_dt = None  # The dt that step_units was worked out for
+        self.step_units = 0  # Distance moved per update, in units
+        self.decision_pending = False  # Queued in an AIScheduler, waiting for a decision
+    
+    @property
+    def x(self):
+        return self.fx / SUBPIXELS
+    
+    @x.setter
+    def x(self, value):
+        self.fx = round(value * SUBPIXELS)
+    
+    @property
+    def y(self):
+        return self.fy / SUBPIXELS
+    
+    @y.setter
+    def y(self, value):
+        self.fy = round(value * SUBPIXELS)
         
-    def update(self, dt, walls, pacman_pos, pacman_power_mode):
+    def update(self, dt, walls, flow_field, pacman_power_mode, scheduler=None):
+        """Move the ghost, re-deciding its direction when due
+
+        With an AIScheduler the decisions go through its per-step budget and
+        may be deferred; without one they are made immediately.
+        """
         # Update vulnerability based on Pacman's power mode
         self.vulnerable = pacman_power_mode
         
@@ -36,151 +62,116 @@ class Ghost:
         # Update direction change timer
         self.direction_timer += dt
         
+        # Distance per update, only worked out again when dt changes
+        if dt != self.step_dt:
+            self.step_dt = dt
+            self.step_units = round(self.speed * dt * SUBPIXELS)
+        step = self.step_units
+        
         # Change direction periodically or when hitting a wall
         if (self.direction_timer - self.last_direction_change > self.direction_change_interval or 
-            self.check_wall_collision(self.x + self.direction[0] * self.speed * dt, 
-                                    self.y + self.direction[1] * self.speed * dt, walls)):
-            self.choose_new_direction(walls, pacman_pos, pacman_power_mode)
-            self.last_direction_change = self.direction_timer
+            self.check_wall_collision(self.fx + self.direction[0] * step, 
+                                    self.fy + self.direction[1] * step, walls)):
+            if scheduler is None:
+                self.choose_new_direction(flow_field, pacman_power_mode)
+                self.last_direction_change = self.direction_timer
+            else:
+                scheduler.request(self, flow_field, pacman_power_mode)
         
         # Move ghost
-        dx = self.direction[0] * self.speed * dt
-        dy = self.direction[1] * self.speed * dt
-        
-        new_x = self.x + dx
-        new_y = self.y + dy
+        new_x = self.fx + self.direction[0] * step
+        new_y = self.fy + self.direction[1] * step
         
         # Check wall collisions
         if not self.check_wall_collision(new_x, new_y, walls):
-            self.x = new_x
-            self.y = new_y
+            self.fx = new_x
+            self.fy = new_y
         else:
             # Stop movement if hitting a wall and choose new direction
-            self.choose_new_direction(walls, pacman_pos, pacman_power_mode)
+            if scheduler is None:
+                self.choose_new_direction(flow_field, pacman_power_mode)
+            else:
+                scheduler.request(self, flow_field, pacman_power_mode, restart_timer=False)
             # Snap to grid
-            self.x = round(self.x / TILE_SIZE) * TILE_SIZE
-            self.y = round(self.y / TILE_SIZE) * TILE_SIZE
+            self.fx = (self.fx + TILE_UNITS // 2) // TILE_UNITS * TILE_UNITS
+            self.fy = (self.fy + TILE_UNITS // 2) // TILE_UNITS * TILE_UNITS
     
-    def choose_new_direction(self, walls, pacman_pos, pacman_power_mode):
-        """Choose a new direction based on simple AI"""
+    def choose_new_direction(self, flow_field, pacman_power_mode):
+        """Choose a new direction based on simple AI using the shared flow field to Pacman"""
         # Get current grid position
-        grid_x = int(self.x // TILE_SIZE)
-        grid_y = int(self.y // TILE_SIZE)
+        grid_x = self.fx // TILE_UNITS
+        grid_y = self.fy // TILE_UNITS
         
-        # Available directions
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        valid_directions = []
-        
-        # Check which directions are valid (no walls)
-        for dx, dy in directions:
-            new_x = grid_x + dx
-            new_y = grid_y + dy
-            
-            # Check bounds
-            if (0 <= new_x < MAP_WIDTH and 0 <= new_y < MAP_HEIGHT and 
-                not walls[new_y][new_x]):
-                valid_directions.append((dx, dy))
+        # Valid directions (no walls) are precomputed for every tile
+        valid_directions = flow_field.navigator.exits(grid_x, grid_y)
         
         # If no valid directions, don't move
         if not valid_directions:
             self.direction = (0, 0)
             return
         
-        # Simple AI: behavior changes based on vulnerability
-        pacman_grid_x, pacman_grid_y = pacman_pos
-        distance_to_pacman = math.sqrt((grid_x - pacman_grid_x)**2 + (grid_y - pacman_grid_y)**2)
-        
+        # Simple AI: behavior changes based on vulnerability. The flow field
+        # holds maze distances to Pacman and caches the best exit per tile
         if self.vulnerable:
             # When vulnerable, try to run away from Pacman
-            best_direction = None
-            best_distance = 0
-            
-            for dx, dy in valid_directions:
-                new_x = grid_x + dx
-                new_y = grid_y + dy
-                distance = math.sqrt((new_x - pacman_grid_x)**2 + (new_y - pacman_grid_y)**2)
-                if distance > best_distance:
-                    best_distance = distance
-                    best_direction = (dx, dy)
-            
+            best_direction = flow_field.flee_direction(grid_x, grid_y)
             if best_direction:
                 self.direction = best_direction
             else:
-                self.direction = random.choice(valid_directions)
+                self.direction = self.rng.choice(valid_directions)
         else:
             # Normal behavior: sometimes move towards Pacman, sometimes random
-            if distance_to_pacman < 5 and random.random() < 0.3:
+            if flow_field.distance(grid_x, grid_y) < 5 and self.rng.random() < 0.3:
                 # Try to move towards Pacman
-                best_direction = None
-                best_distance = float('inf')
-                
-                for dx, dy in valid_directions:
-                    new_x = grid_x + dx
-                    new_y = grid_y + dy
-                    distance = math.sqrt((new_x - pacman_grid_x)**2 + (new_y - pacman_grid_y)**2)
-                    if distance < best_distance:
-                        best_distance = distance
-                        best_direction = (dx, dy)
-                
+                best_direction = flow_field.chase_direction(grid_x, grid_y)
                 if best_direction:
                     self.direction = best_direction
                 else:
-                    self.direction = random.choice(valid_directions)
+                    self.direction = self.rng.choice(valid_directions)
             else:
                 # Random movement
-                self.direction = random.choice(valid_directions)
+                self.direction = self.rng.choice(valid_directions)
     
     def check_wall_collision(self, x, y, walls):
-        """Check if the ghost would collide with a wall at the given position"""
-        tile_x = int(x // TILE_SIZE)
-        tile_y = int(y // TILE_SIZE)
+        """Check if the ghost would collide with a wall at (x, y), given in fixed-point units"""
+        tile_x = x // TILE_UNITS
+        tile_y = y // TILE_UNITS
         
         # Check bounds
-        if tile_x < 0 or tile_x >= MAP_WIDTH or tile_y < 0 or tile_y >= MAP_HEIGHT:
+        if tile_x < 0 or tile_y < 0 or tile_y >= len(walls) or tile_x >= len(walls[0]):
             return True
             
         # Check if it's a wall
         return walls[tile_y][tile_x]
     
     def get_grid_position(self):
-        return (int(self.x // TILE_SIZE), int(self.y // TILE_SIZE))
+        return (self.fx // TILE_UNITS, self.fy // TILE_UNITS)
     
-    def draw(self, screen):
+    def render_position(self, alpha=1.0):
+        """Where to draw the ghost: alpha of the way from the previous update's position to the current one"""
+        if alpha >= 1.0:
+            return self.x, self.y
+        return ((self.prev_fx + (self.fx - self.prev_fx) * alpha) / SUBPIXELS,
+                (self.prev_fy + (self.fy - self.prev_fy) * alpha) / SUBPIXELS)
+    
+    def draw(self, screen, sprites, flash=False, offset=(0, 0), alpha=1.0):
+        """Blit the ghost's pre-rendered frame and return the screen rect drawn over (None if eaten)
+
+        flash selects the white frame while vulnerable; Game.draw works it out
+        once per frame so the ghosts flash in sync. offset is the camera's
+        world position, subtracted to get screen coordinates, and alpha
+        interpolates between updates (see render_position).
+        """
         # Don't draw if eaten
         if self.eaten:
-            return
+            return None
             
         # Choose color based on vulnerability
         if self.vulnerable:
             # Flash between blue and white when vulnerable
-            flash_color = BLUE if int(pygame.time.get_ticks() / 200) % 2 == 0 else WHITE
-            ghost_color = flash_color
+            ghost_color = WHITE if flash else BLUE
         else:
             ghost_color = self.original_color
         
-        # Draw ghost body (slightly different shape than Pacman)
-        pygame.draw.circle(screen, ghost_color, (int(self.x), int(self.y)), self.radius)
-        
-        # Draw ghost bottom (wavy bottom)
-        bottom_y = int(self.y) + self.radius
-        wave_points = []
-        for i in range(0, self.radius * 2, 4):
-            x_offset = i - self.radius
-            wave_y = bottom_y + math.sin(i * 0.5) * 3
-            wave_points.append((int(self.x) + x_offset, int(wave_y)))
-        
-        if wave_points:
-            pygame.draw.polygon(screen, ghost_color, wave_points)
-        
-        # Draw eyes
-        eye_offset = self.radius // 3
-        pygame.draw.circle(screen, WHITE, 
-                         (int(self.x - eye_offset), int(self.y - eye_offset)), 3)
-        pygame.draw.circle(screen, WHITE, 
-                         (int(self.x + eye_offset), int(self.y - eye_offset)), 3)
-        
-        # Draw eye pupils
-        pygame.draw.circle(screen, BLACK, 
-                         (int(self.x - eye_offset), int(self.y - eye_offset)), 1)
-        pygame.draw.circle(screen, BLACK, 
-                         (int(self.x + eye_offset), int(self.y - eye_offset)), 1)
+        x, y = self.render_position(alpha)
+        return sprites.blit(screen, sprites.ghost_frame(ghost_color), x - offset[0], y - offset[1])
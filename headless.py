@@ -0,0 +1,123 @@
+"""
+Headless fixed-timestep simulation of the Pacman game
+
+Runs game.Game without a window, fonts or a pygame clock. The game is
+advanced in fixed dt steps as fast as the CPU allows, with input coming
+from a scripted or agent input source instead of the keyboard.
+
+    python headless.py --ticks 100000 --input random
+"""
+
+import argparse
+import random
+import time
+from constants import FPS
+from game import Game
+
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def apply_input(game, action):
+    """Apply what an input source returned: None, one action, or a list of actions in order"""
+    if isinstance(action, list):
+        for each in action:
+            game.apply_action(each)
+    elif action is not None:
+        game.apply_action(action)
+
+
+class ScriptedInput:
+    """Input source that plays back a fixed script of (tick, action) pairs
+
+    A tick may appear several times (say, a restart and a direction pressed
+    in the same frame); its actions are returned as a list, in script order.
+    """
+
+    def __init__(self, script):
+        self.actions = {}  # tick -> list of actions
+        for tick, action in script:
+            self.actions.setdefault(tick, []).append(action)
+
+    def __call__(self, game, tick):
+        return self.actions.get(tick)
+
+
+class RandomInput:
+    """Input source that picks a random direction every few ticks"""
+
+    def __init__(self, interval=15, seed=None):
+        self.interval = interval
+        self.random = random.Random(seed)
+
+    def __call__(self, game, tick):
+        if game.game_over or game.win:
+            return "restart"
+        if tick % self.interval == 0:
+            return self.random.choice(DIRECTIONS)
+        return None
+
+
+class HeadlessRunner:
+    def __init__(self, game=None, dt=1.0 / FPS, input_source=None):
+        self.game = game if game is not None else Game()
+        self.dt = dt
+        # An input source is any callable (game, tick) -> action, list of
+        # actions or None, where an action is anything Game.apply_action accepts
+        self.input_source = input_source
+        self.tick = 0
+
+    def step(self):
+        """Apply this tick's input and advance the game by one fixed step"""
+        if self.input_source is not None:
+            apply_input(self.game, self.input_source(self.game, self.tick))
+        self.game.update(self.dt)
+        self.tick += 1
+
+    def run(self, max_ticks, stop_on_end=True):
+        """Run up to max_ticks steps and return a summary of the run"""
+        game = self.game
+        start_tick = self.tick
+        start_time = time.perf_counter()
+        for _ in range(max_ticks):
+            if stop_on_end and (game.game_over or game.win):
+                break
+            self.step()
+        elapsed = time.perf_counter() - start_time
+        ticks = self.tick - start_tick
+
+        return {
+            "ticks": ticks,
+            "elapsed": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+            "simulated_seconds": ticks * self.dt,
+            "score": game.pacman.score,
+            "lives": game.pacman.lives,
+            "level": game.level,
+            "game_over": game.game_over,
+            "win": game.win,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Pacman game headless")
+    parser.add_argument("--ticks", type=int, default=100000, help="number of fixed steps to simulate")
+    parser.add_argument("--dt", type=float, default=1.0 / FPS, help="seconds of game time per step")
+    parser.add_argument("--input", choices=["idle", "random"], default="random", help="input source")
+    parser.add_argument("--input-seed", type=int, default=None, help="seed for the random input source")
+    parser.add_argument("--seed", type=int, default=None, help="seed for maps and ghost AI")
+    args = parser.parse_args()
+
+    input_source = RandomInput(seed=args.input_seed) if args.input == "random" else None
+    runner = HeadlessRunner(Game(seed=args.seed), args.dt, input_source)
+    # Soak runs keep going through game over (the random input restarts)
+    result = runner.run(args.ticks, stop_on_end=False)
+
+    print(f"Simulated {result['ticks']} ticks ({result['simulated_seconds']:.1f}s of game time) "
+          f"in {result['elapsed']:.2f}s")
+    print(f"Ticks per second: {result['ticks_per_second']:.0f}")
+    print(f"Score: {result['score']}  Lives: {result['lives']}  Level: {result['level']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Font and rendered-text cache for HUD drawing
+"""
+
+import pygame
+from collections import OrderedDict
+
+
+class TextCache:
+    """Loads each font size once and keeps rendered text surfaces by content
+
+    Most HUD strings (score, lives, level, messages) are identical from one
+    frame to the next, so they are rasterized only when their text or color
+    changes. The least recently used surfaces are evicted once max_entries
+    is reached, which keeps ever-changing strings like the score bounded.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size):
+        """Return the default font at the given size, loading it on first use"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def render(self, text, size, color):
+        """Return an antialiased surface for text, rendering it only if not cached"""
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.font(size).render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
@@ -0,0 +1,185 @@
+"""
+Compact binary level files, loaded through mmap
+
+Layout (little-endian):
+
+    header       magic, version, flags, width, height, Pacman start, ghost and table counts
+    ghost spawns ghost_count x (x, y) uint16
+    walls        width * height bytes, 1 = wall
+    pellets      width * height bytes of pellet kinds (EMPTY/PELLET/POWER_PELLET)
+    exit masks   width * height bytes, if FLAG_EXITS is set (see navigation.MazeNavigator)
+    tables       table_count x uint32 target tile index, then, 8-byte aligned,
+                 table_count x width * height uint16 maze distances
+
+The file is mapped read-only, so opening it costs almost nothing and every
+process that loads the same file shares the same pages. Walls are served
+as one memoryview per row straight out of the mapping; only the pellets,
+which change during play, are copied.
+
+    python levelfile.py export big.lvl --size 500 --level 1 --seed 7 --distances center
+    python levelfile.py info big.lvl
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+from array import array
+from constants import MAP_WIDTH, MAP_HEIGHT
+
+
+MAGIC = b"PACLEVEL"
+VERSION = 1
+FLAG_EXITS = 1
+
+HEADER = struct.Struct("<8sHHHHHHII")  # magic, version, flags, width, height, start x, start y, ghosts, tables
+SPAWN = struct.Struct("<HH")
+
+_open_files = {}  # path -> LevelFile, so a process maps each file once
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class LevelFile:
+    """A level file mapped into memory, with zero-copy views of its sections"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self.map)
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is not a level file (too short)")
+        (magic, version, self.flags, self.width, self.height, start_x, start_y,
+         ghost_count, table_count) = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a level file (bad magic)")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported level file version {version}")
+        self.pacman_start = (start_x, start_y)
+
+        tiles = self.width * self.height
+        offset = HEADER.size
+        self.ghost_spawns = [SPAWN.unpack_from(data, offset + i * SPAWN.size) for i in range(ghost_count)]
+        offset += ghost_count * SPAWN.size
+        self.walls_data = data[offset:offset + tiles]
+        offset += tiles
+        self.pellets_data = data[offset:offset + tiles]
+        offset += tiles
+        self.exit_masks = None
+        if self.flags & FLAG_EXITS:
+            self.exit_masks = data[offset:offset + tiles]
+            offset += tiles
+        self.table_targets = struct.unpack_from(f"<{table_count}I", data, offset)
+        offset = _align(offset + 4 * table_count)
+        self.tables_offset = offset
+        if len(data) < offset + table_count * tiles * 2:
+            raise ValueError(f"{path} is truncated")
+
+    @classmethod
+    def open(cls, path):
+        """Return the process-wide mapping of a level file, opening it on first use"""
+        level_file = _open_files.get(path)
+        if level_file is None:
+            level_file = _open_files[path] = cls(path)
+        return level_file
+
+    def wall_rows(self):
+        """Walls as a list of read-only row views, indexable as walls[y][x] like generated maps"""
+        width = self.width
+        data = self.walls_data
+        return [data[y * width:(y + 1) * width] for y in range(self.height)]
+
+    def distance_tables(self):
+        """Yield (target tile index, distance table view) for every stored table"""
+        tiles = self.width * self.height
+        data = memoryview(self.map)
+        for i, target in enumerate(self.table_targets):
+            start = self.tables_offset + i * tiles * 2
+            table = data[start:start + tiles * 2]
+            if sys.byteorder == "little":
+                yield target, table.cast("H")
+            else:
+                swapped = array("H", table.tobytes())
+                swapped.byteswap()
+                yield target, swapped
+
+
+def save_level(path, walls, pellets, pacman_start, ghost_spawns=(), navigator=None, distance_targets=()):
+    """Write a level file
+
+    walls is indexable as walls[y][x] and pellets is a PelletStore. Ghosts
+    the spawns don't cover are placed at random when the level loads. Pass a
+    MazeNavigator to store its exit masks, and tile indices in
+    distance_targets to store the distance tables to those tiles too.
+    """
+    height = len(walls)
+    width = len(walls[0]) if height else 0
+    flags = FLAG_EXITS if navigator is not None else 0
+    distance_targets = list(distance_targets) if navigator is not None else []
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, width, height, pacman_start[0], pacman_start[1],
+                            len(ghost_spawns), len(distance_targets)))
+        for x, y in ghost_spawns:
+            f.write(SPAWN.pack(x, y))
+        f.write(b"".join(bytes(row) for row in walls))
+        f.write(bytes(pellets.kinds))
+        if navigator is not None:
+            f.write(bytes(navigator.exit_masks))
+        offset = f.tell() + 4 * len(distance_targets)
+        f.write(struct.pack(f"<{len(distance_targets)}I", *distance_targets))
+        f.write(bytes(_align(offset) - offset))
+        for target in distance_targets:
+            table = array("H", navigator.distances_from(target % width, target // width))
+            if sys.byteorder != "little":
+                table.byteswap()
+            f.write(table.tobytes())
+
+
+def main():
+    from levels import LevelGenerator
+
+    parser = argparse.ArgumentParser(description="Export generated maps as level files, or inspect one")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="generate a map and save it as a level file")
+    export.add_argument("path")
+    export.add_argument("--level", type=int, default=1, help="level layout to generate")
+    export.add_argument("--seed", type=int, default=None, help="random seed for the layout")
+    export.add_argument("--width", type=int, default=MAP_WIDTH)
+    export.add_argument("--height", type=int, default=MAP_HEIGHT)
+    export.add_argument("--size", type=int, help="width and height at once")
+    export.add_argument("--distances", choices=["none", "center", "all"], default="none",
+                        help="distance tables to precompute (all is only sensible for small maps)")
+    info = commands.add_parser("info", help="describe a level file")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        width = height = args.size
+        if args.size is None:
+            width, height = args.width, args.height
+        generator = LevelGenerator(width, height, random.Random(args.seed))
+        walls, pellets, navigator = generator.generate_map(args.level)
+        center_x, center_y = width // 2, height // 2
+        spawns = [ghost.get_grid_position() for ghost in generator.create_ghosts(args.level, center_x, center_y)]
+        if args.distances == "center":
+            targets = [center_y * width + center_x]
+        elif args.distances == "all":
+            targets = [y * width + x for y in range(height) for x in range(width) if not walls[y][x]]
+        else:
+            targets = []
+        save_level(args.path, walls, pellets, (center_x, center_y), spawns, navigator, targets)
+        print(f"Wrote {width}x{height} level {args.level} with {len(spawns)} ghost spawns "
+              f"and {len(targets)} distance tables to {args.path}")
+    else:
+        level_file = LevelFile(args.path)
+        print(f"{args.path}: {level_file.width}x{level_file.height}, Pacman starts at {level_file.pacman_start}")
+        print(f"{len(level_file.ghost_spawns)} ghost spawns, {len(level_file.table_targets)} distance tables, "
+              f"exit masks {'stored' if level_file.exit_masks is not None else 'not stored'}")
+
+
+if __name__ == "__main__":
+    main()
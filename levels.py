@@ -3,22 +3,37 @@ Level generation and map logic
 """
 
 import random
-from constants import MAP_WIDTH, MAP_HEIGHT, TILE_SIZE, RED, PINK, CYAN, ORANGE, GREEN
+from array import array
+from collections import deque
+from constants import MAP_WIDTH, MAP_HEIGHT, TILE_SIZE, RED, PINK, CYAN, ORANGE, GREEN, LARGE_MAP_TILES, NAVIGATION_HORIZON
 from ghosts import Ghost
+from pellets import PelletStore, PELLET, POWER_PELLET
+from navigation import MazeNavigator
+from levelfile import LevelFile
+
+
+# Maps a row of walls (1 = wall) to a row of pellet kinds (PELLET on open tiles)
+OPEN_TO_PELLET = bytes.maketrans(bytes([0, 1]), bytes([PELLET, 0]))
+# Maps pellet kinds to 1 where there is any pellet
+HAS_PELLET = bytes.maketrans(bytes([PELLET, POWER_PELLET]), bytes([1, 1]))
 
 
 class LevelGenerator:
-    def __init__(self):
+    def __init__(self, width=MAP_WIDTH, height=MAP_HEIGHT, rng=None):
+        self.width = width
+        self.height = height
+        # Random source for map layout and ghost spawns (and handed to the ghosts);
+        # pass a seeded random.Random for reproducible games
+        self.rng = rng if rng is not None else random.Random()
         self.walls = []
-        self.pellets = []
-        self.power_pellets = []
+        self.pellets = None
+        self.navigator = None
     
     def generate_map(self, level):
         """Generate a map layout based on current level"""
         # Create a simple maze pattern
-        self.walls = [[False for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
-        self.pellets = [[False for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
-        self.power_pellets = [[False for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
+        self.walls = [[False for _ in range(self.width)] for _ in range(self.height)]
+        self.pellets = PelletStore(self.width, self.height)
         
         if level == 1:
             self.generate_level1_map()
@@ -28,131 +43,256 @@ class LevelGenerator:
             # Default to level 1 for now
             self.generate_level1_map()
         
-        # Place pellets in empty spaces
-        for y in range(1, MAP_HEIGHT-1):
-            for x in range(1, MAP_WIDTH-1):
-                if not self.walls[y][x]:
-                    self.pellets[y][x] = True
+        # Place pellets in empty spaces (built row by row as bytes and loaded in one go)
+        pellet_rows = [bytes(self.width)]
+        for y in range(1, self.height-1):
+            row = bytearray(bytes(self.walls[y]).translate(OPEN_TO_PELLET))
+            row[0] = row[-1] = 0
+            pellet_rows.append(row)
+        pellet_rows.append(bytes(self.width))
+        kinds = b"".join(pellet_rows)
+        self.pellets.load(kinds, kinds.count(PELLET))
         
         # Place power pellets in corners (ensure they're accessible)
         power_pellet_positions = [
-            (1, 1), (MAP_WIDTH-2, 1), (1, MAP_HEIGHT-2), (MAP_WIDTH-2, MAP_HEIGHT-2)  # Corners only
+            (1, 1), (self.width-2, 1), (1, self.height-2), (self.width-2, self.height-2)  # Corners only
         ]
         
         for x, y in power_pellet_positions:
             if not self.walls[y][x]:
-                self.power_pellets[y][x] = True
-                self.pellets[y][x] = False  # Remove regular pellet if power pellet is placed
+                self.pellets.place(x, y, POWER_PELLET)  # Replaces the regular pellet
         
         # Ensure all areas are accessible by clearing some walls if needed
         self.ensure_accessibility()
+        # Then verify every pellet can be reached and open any walls still in the way
+        self.ensure_connectivity()
         
-        return self.walls, self.pellets, self.power_pellets
+        # Precompute exits and set up maze-distance lookups for the ghosts
+        # (searches are bounded on large maps so they stay cheap)
+        horizon = NAVIGATION_HORIZON if self.width * self.height > LARGE_MAP_TILES else None
+        self.navigator = MazeNavigator(self.walls, horizon=horizon)
+        
+        return self.walls, self.pellets, self.navigator
     
     def generate_level1_map(self):
         """Generate Level 1 map (simple accessible maze)"""
         # Create border walls
-        for x in range(MAP_WIDTH):
+        for x in range(self.width):
             self.walls[0][x] = True
-            self.walls[MAP_HEIGHT-1][x] = True
-        for y in range(MAP_HEIGHT):
+            self.walls[self.height-1][x] = True
+        for y in range(self.height):
             self.walls[y][0] = True
-            self.walls[y][MAP_WIDTH-1] = True
+            self.walls[y][self.width-1] = True
         
         # Create a simple maze with guaranteed paths
         # Add some strategic walls but ensure connectivity
         
         # Add a few horizontal walls (with gaps)
-        for y in range(3, MAP_HEIGHT-3, 4):
-            for x in range(2, MAP_WIDTH-2, 3):
-                if random.random() < 0.4:  # 40% chance of wall
+        for y in range(3, self.height-3, 4):
+            for x in range(2, self.width-2, 3):
+                if self.rng.random() < 0.4:  # 40% chance of wall
                     self.walls[y][x] = True
         
         # Add a few vertical walls (with gaps)
-        for x in range(3, MAP_WIDTH-3, 4):
-            for y in range(2, MAP_HEIGHT-2, 3):
-                if random.random() < 0.4:  # 40% chance of wall
+        for x in range(3, self.width-3, 4):
+            for y in range(2, self.height-2, 3):
+                if self.rng.random() < 0.4:  # 40% chance of wall
                     self.walls[y][x] = True
         
         # Ensure center area is accessible
-        center_x, center_y = MAP_WIDTH // 2, MAP_HEIGHT // 2
+        center_x, center_y = self.width // 2, self.height // 2
         # Clear a path around center
         for dx in range(-1, 2):
             for dy in range(-1, 2):
-                if 0 <= center_x + dx < MAP_WIDTH and 0 <= center_y + dy < MAP_HEIGHT:
+                if 0 <= center_x + dx < self.width and 0 <= center_y + dy < self.height:
                     self.walls[center_y + dy][center_x + dx] = False
     
     def generate_level2_map(self):
         """Generate Level 2 map (cross pattern with accessible paths)"""
         # Create border walls
-        for x in range(MAP_WIDTH):
+        for x in range(self.width):
             self.walls[0][x] = True
-            self.walls[MAP_HEIGHT-1][x] = True
-        for y in range(MAP_HEIGHT):
+            self.walls[self.height-1][x] = True
+        for y in range(self.height):
             self.walls[y][0] = True
-            self.walls[y][MAP_WIDTH-1] = True
+            self.walls[y][self.width-1] = True
         
         # Create a cross pattern in the center but ensure accessibility
-        center_x, center_y = MAP_WIDTH // 2, MAP_HEIGHT // 2
+        center_x, center_y = self.width // 2, self.height // 2
         
         # Horizontal cross (with gaps for access)
         for x in range(center_x - 1, center_x + 2):
-            if 0 <= x < MAP_WIDTH and x != center_x:  # Leave center open
+            if 0 <= x < self.width and x != center_x:  # Leave center open
                 self.walls[center_y][x] = True
         
         # Vertical cross (with gaps for access)
         for y in range(center_y - 1, center_y + 2):
-            if 0 <= y < MAP_HEIGHT and y != center_y:  # Leave center open
+            if 0 <= y < self.height and y != center_y:  # Leave center open
                 self.walls[y][center_x] = True
         
         # Add corner blocks (2x2 blocks) but ensure paths around them
-        corner_blocks = [(2, 2), (MAP_WIDTH-3, 2), (2, MAP_HEIGHT-3), (MAP_WIDTH-3, MAP_HEIGHT-3)]
+        corner_blocks = [(2, 2), (self.width-3, 2), (2, self.height-3), (self.width-3, self.height-3)]
         for x, y in corner_blocks:
             self.walls[y][x] = True
-            if x+1 < MAP_WIDTH:
+            if x+1 < self.width:
                 self.walls[y][x+1] = True
-            if y+1 < MAP_HEIGHT:
+            if y+1 < self.height:
                 self.walls[y+1][x] = True
-            if x+1 < MAP_WIDTH and y+1 < MAP_HEIGHT:
+            if x+1 < self.width and y+1 < self.height:
                 self.walls[y+1][x+1] = True
         
         # Add some strategic walls but ensure connectivity
-        for y in range(2, MAP_HEIGHT-2, 3):
-            for x in range(2, MAP_WIDTH-2, 3):
-                if random.random() < 0.2:  # 20% chance of wall (reduced)
+        for y in range(2, self.height-2, 3):
+            for x in range(2, self.width-2, 3):
+                if self.rng.random() < 0.2:  # 20% chance of wall (reduced)
                     self.walls[y][x] = True
         
         # Ensure all corners are accessible by clearing paths
-        corner_paths = [(1, 2), (2, 1), (MAP_WIDTH-3, 1), (MAP_WIDTH-2, 2), 
-                       (1, MAP_HEIGHT-3), (2, MAP_HEIGHT-2), (MAP_WIDTH-3, MAP_HEIGHT-2), (MAP_WIDTH-2, MAP_HEIGHT-3)]
+        corner_paths = [(1, 2), (2, 1), (self.width-3, 1), (self.width-2, 2), 
+                       (1, self.height-3), (2, self.height-2), (self.width-3, self.height-2), (self.width-2, self.height-3)]
         for x, y in corner_paths:
-            if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
+            if 0 <= x < self.width and 0 <= y < self.height:
                 self.walls[y][x] = False
     
     def ensure_accessibility(self):
         """Ensure all areas of the map are accessible by clearing some walls if needed"""
         # Create a simple accessibility check by ensuring there are paths from center to corners
-        center_x, center_y = MAP_WIDTH // 2, MAP_HEIGHT // 2
+        center_x, center_y = self.width // 2, self.height // 2
         
         # Clear paths from center to each corner
-        corners = [(1, 1), (MAP_WIDTH-2, 1), (1, MAP_HEIGHT-2), (MAP_WIDTH-2, MAP_HEIGHT-2)]
+        corners = [(1, 1), (self.width-2, 1), (1, self.height-2), (self.width-2, self.height-2)]
         
         for corner_x, corner_y in corners:
             # Clear a path from center to corner (simple L-shaped path)
             # Horizontal path first
             start_x, end_x = min(center_x, corner_x), max(center_x, corner_x)
             for x in range(start_x, end_x + 1):
-                if 0 <= x < MAP_WIDTH and 0 <= center_y < MAP_HEIGHT:
+                if 0 <= x < self.width and 0 <= center_y < self.height:
                     self.walls[center_y][x] = False
             
             # Then vertical path
             start_y, end_y = min(center_y, corner_y), max(center_y, corner_y)
             for y in range(start_y, end_y + 1):
-                if 0 <= corner_x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
+                if 0 <= corner_x < self.width and 0 <= y < self.height:
                     self.walls[y][corner_x] = False
     
-    def create_ghosts(self, level, center_x, center_y):
-        """Create ghosts based on current level"""
+    def ensure_connectivity(self):
+        """Open as few walls as needed so every pellet is reachable from Pacman's start
+
+        A flood fill from the center marks the reachable tiles in linear time.
+        Only if some pellets are cut off, a 0-1 BFS from the reachable area
+        (open tiles cost 0, interior walls cost 1, the border is never opened)
+        finds the cheapest way into each cut-off pocket, and the walls along
+        that path are removed. Returns the number of walls opened.
+        """
+        width, height = self.width, self.height
+        # One byte per tile: 0 open, 1 wall, 2 border (never opened)
+        terrain = bytearray(b"".join(bytes(row) for row in self.walls))
+        terrain[:width] = b"\x02" * width
+        terrain[-width:] = b"\x02" * width
+        terrain[::width] = b"\x02" * height
+        terrain[width - 1::width] = b"\x02" * height
+
+        start = (height // 2) * width + width // 2
+        reached = bytearray(width * height)
+        self.flood_fill(terrain, reached, [start])
+        # Any pellet outside the reached area? (checked on the whole grid at once as big integers)
+        has_pellet = bytes(self.pellets.kinds).translate(HAS_PELLET)
+        if not int.from_bytes(has_pellet, "little") & ~int.from_bytes(reached, "little"):
+            return 0
+        cut_off = [index for index, kind in enumerate(has_pellet) if kind and not reached[index]]
+
+        # Cheapest number of walls to open from the reachable area to every tile
+        tiles = width * height
+        cost = array("i", [tiles]) * tiles
+        parent = array("i", [-1]) * tiles
+        queue = deque()
+        for index in range(tiles):
+            if reached[index]:
+                cost[index] = 0
+                queue.append(index)
+        offsets = (-1, 1, -width, width)
+        while queue:
+            index = queue.popleft()
+            here = cost[index]
+            for offset in offsets:
+                neighbour = index + offset
+                kind = terrain[neighbour]
+                if kind == 2:
+                    continue
+                new_cost = here + kind
+                if new_cost < cost[neighbour]:
+                    cost[neighbour] = new_cost
+                    parent[neighbour] = index
+                    if kind:
+                        queue.append(neighbour)
+                    else:
+                        queue.appendleft(neighbour)
+
+        opened = 0
+        for index in cut_off:
+            if reached[index]:
+                continue  # Joined up by an earlier path
+            # Walk back to the reachable area, opening the walls on the way
+            path = []
+            while not reached[index]:
+                path.append(index)
+                if terrain[index]:
+                    terrain[index] = 0
+                    self.walls[index // width][index % width] = False
+                    opened += 1
+                index = parent[index]
+            self.flood_fill(terrain, reached, path)
+        return opened
+
+    def flood_fill(self, terrain, reached, seeds):
+        """Mark every open tile connected to the seed tiles in reached (flat indices)"""
+        width = self.width
+        offsets = (-1, 1, -width, width)
+        frontier = []
+        for index in seeds:
+            if not terrain[index] and not reached[index]:
+                reached[index] = 1
+                frontier.append(index)
+        while frontier:
+            next_frontier = []
+            for index in frontier:
+                for offset in offsets:
+                    neighbour = index + offset
+                    if not reached[neighbour] and not terrain[neighbour]:
+                        reached[neighbour] = 1
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+    
+    def load_map(self, path):
+        """Load a map from a level file instead of generating one
+
+        Returns the same (walls, pellets, navigator) as generate_map. The walls
+        are row views into the memory-mapped file rather than lists; only the
+        pellets are copied, since they change during play. Stored exit masks
+        and distance tables are used as they are. The file's Pacman start and
+        ghost spawns are kept in pacman_start and ghost_spawns.
+        """
+        level_file = LevelFile.open(path)
+        self.width, self.height = level_file.width, level_file.height
+        self.walls = level_file.wall_rows()
+        self.pellets = PelletStore(self.width, self.height)
+        self.pellets.load(level_file.pellets_data)
+        self.pacman_start = level_file.pacman_start
+        self.ghost_spawns = level_file.ghost_spawns
+        
+        horizon = NAVIGATION_HORIZON if self.width * self.height > LARGE_MAP_TILES else None
+        self.navigator = MazeNavigator(self.walls, horizon=horizon, exit_masks=level_file.exit_masks,
+                                       stored_tables=dict(level_file.distance_tables()))
+        return self.walls, self.pellets, self.navigator
+    
+    def create_ghosts(self, level, center_x, center_y, spawns=None):
+        """Create ghosts based on current level
+
+        Ghosts start at the given spawn tiles (in order) when a level file
+        provides them; any the spawns don't cover start at random open tiles
+        away from (center_x, center_y).
+        """
         ghosts = []
         
         if level == 1:
@@ -171,21 +311,29 @@ class LevelGenerator:
             ghost_names = ["Blinky", "Pinky", "Inky", "Clyde"]
             num_ghosts = 4
         
-        # Find empty positions for ghosts (avoid center area where Pacman is)
+        spawns = list(spawns or ())[:num_ghosts]
+        for i, (x, y) in enumerate(spawns):
+            ghosts.append(Ghost(x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2,
+                                ghost_colors[i], ghost_names[i], self.rng))
+        if len(ghosts) == num_ghosts:
+            return ghosts
+        
+        # Find empty positions for ghosts (avoid center area where Pacman is, and the spawns used)
         ghost_positions = []
-        for y in range(1, MAP_HEIGHT-1):
-            for x in range(1, MAP_WIDTH-1):
+        for y in range(1, self.height-1):
+            for x in range(1, self.width-1):
                 if (not self.walls[y][x] and 
-                    abs(x - center_x) > 1 and abs(y - center_y) > 1):  # Keep ghosts away from Pacman (reduced distance for smaller map)
+                    abs(x - center_x) > 1 and abs(y - center_y) > 1 and  # Keep ghosts away from Pacman (reduced distance for smaller map)
+                    (x, y) not in spawns):
                     ghost_positions.append((x, y))
         
-        # Create ghosts at random positions
-        for i in range(min(num_ghosts, len(ghost_positions))):
-            x, y = random.choice(ghost_positions)
+        # Create the remaining ghosts at random positions
+        for i in range(len(ghosts), min(num_ghosts, len(ghosts) + len(ghost_positions))):
+            x, y = self.rng.choice(ghost_positions)
             ghost_positions.remove((x, y))  # Remove to avoid duplicates
             ghost = Ghost(x * TILE_SIZE + TILE_SIZE // 2, 
                          y * TILE_SIZE + TILE_SIZE // 2,
-                         ghost_colors[i], ghost_names[i])
+                         ghost_colors[i], ghost_names[i], self.rng)
             ghosts.append(ghost)
         
         return ghosts
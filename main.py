@@ -2,57 +2,124 @@
 Main entry point for the Pacman game
 """
 
+import argparse
 import pygame
+import random
 import sys
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+from constants import MAP_WIDTH, MAP_HEIGHT, VIEW_WIDTH, VIEW_HEIGHT, TILE_SIZE, FPS, MAX_FRAME_TIME
 from game import Game
+from replay import InputRecorder
+from profiler import FrameProfiler
+from levelfile import LevelFile
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Play Pacman")
+    parser.add_argument("--map-width", type=int, default=MAP_WIDTH, help="map width in tiles")
+    parser.add_argument("--map-height", type=int, default=MAP_HEIGHT, help="map height in tiles")
+    parser.add_argument("--seed", type=int, default=None, help="seed for maps and ghost AI")
+    parser.add_argument("--fps", type=int, default=FPS, help="render rate; the simulation always steps at FPS")
+    parser.add_argument("--record", metavar="PATH", help="record inputs for replay.py")
+    parser.add_argument("--level-file", action="append", default=[], metavar="PATH",
+                        help="play a level file (see levelfile.py); repeat for levels 2, 3, ...")
+    parser.add_argument("--profile", action="store_true", help="show per-phase frame times and print a histogram on exit")
+    parser.add_argument("--ai-budget", type=float, metavar="MS",
+                        help="cap ghost AI time per step in milliseconds (recordings may then not replay exactly)")
+    args = parser.parse_args()
+    
+    level_files = {level: path for level, path in enumerate(args.level_file, 1)}
+    if 1 in level_files:
+        # The first level file decides the map size
+        first = LevelFile.open(level_files[1])
+        args.map_width, args.map_height = first.width, first.height
+    
     pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    # The window shows the whole map when it fits, otherwise a scrolling view
+    screen_width = min(args.map_width, VIEW_WIDTH) * TILE_SIZE
+    screen_height = min(args.map_height, VIEW_HEIGHT) * TILE_SIZE
+    screen = pygame.display.set_mode((screen_width, screen_height))
     pygame.display.set_caption("Simple Pacman Game")
     clock = pygame.time.Clock()
     
-    game = Game()
+    if args.record and args.seed is None:
+        # A recording only replays with the seed it was played with, so pick one to save
+        args.seed = random.randrange(2 ** 32)
+    
+    # The next level's map is built in the background while this one is played
+    game = Game(args.map_width, args.map_height, args.seed, prefetch=True, level_files=level_files)
+    if args.ai_budget is not None:
+        game.ai.time_budget = args.ai_budget / 1000.0
+    # The simulation advances in fixed steps however fast frames are drawn,
+    # so results (and recordings) don't depend on the render rate
+    dt = 1.0 / FPS
+    accumulator = 0.0
+    recorder = InputRecorder(game, dt) if args.record else None
+    tick = 0
+    # Profiling is opt-in; without it no timing code runs
+    profiler = FrameProfiler() if args.profile else None
+    game.profiler = profiler
     
     running = True
     while running:
-        dt = clock.tick(FPS) / 1000.0
+        # After a stall, catch up at most MAX_FRAME_TIME instead of spiralling behind
+        accumulator += min(clock.tick(args.fps) / 1000.0, MAX_FRAME_TIME)
+        if profiler:
+            profiler.begin_frame()
         
         for event in pygame.event.get():
+            action = None
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
-                elif event.key == pygame.K_r and (game.game_over or game.win):
-                    # Restart game
-                    game.level = 1
-                    game.generate_map()
-                elif event.key == pygame.K_f and not game.game_over and not game.win:
+                elif event.key == pygame.K_r:
+                    action = "restart"
+                elif event.key == pygame.K_f:
                     # Skip level if conditions are met
-                    if game.can_skip_level():
-                        game.skip_to_next_level()
+                    action = "skip"
                 elif not game.game_over and not game.win:
                     # Movement controls only work during gameplay
                     if event.key == pygame.K_LEFT or event.key == pygame.K_a:
                         print("Left key pressed")
-                        game.pacman.next_direction = (-1, 0)
+                        action = (-1, 0)
                     elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
                         print("Right key pressed")
-                        game.pacman.next_direction = (1, 0)
+                        action = (1, 0)
                     elif event.key == pygame.K_UP or event.key == pygame.K_w:
                         print("Up key pressed")
-                        game.pacman.next_direction = (0, -1)
+                        action = (0, -1)
                     elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
                         print("Down key pressed")
-                        game.pacman.next_direction = (0, 1)
+                        action = (0, 1)
+            if action is not None:
+                game.apply_action(action)
+                if recorder:
+                    recorder.record(tick, action)
+        if profiler:
+            profiler.lap("events")
         
-        game.update(dt)
-        game.draw(screen)
-        pygame.display.flip()
+        # Input applies from the next step; run as many steps as the elapsed time covers
+        while accumulator >= dt:
+            game.update(dt)
+            tick += 1
+            accumulator -= dt
+        # Draw actors between the last two steps; only push the areas that changed to the display
+        dirty_rects = game.draw(screen, accumulator / dt)
+        if profiler:
+            profiler.lap("draw")
+        pygame.display.update(dirty_rects)
+        if profiler:
+            profiler.lap("display")
+            profiler.end_frame()
+    
+    if profiler:
+        print(profiler.histogram())
+    if recorder:
+        recorder.finish(tick).save(args.record)
+        print(f"Recorded {tick} ticks to {args.record}")
     
+    game.close()
     pygame.quit()
     sys.exit()
 
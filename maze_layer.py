@@ -0,0 +1,131 @@
+"""
+Pre-rendered static maze layer (walls and pellets)
+"""
+
+import pygame
+from collections import OrderedDict
+from constants import TILE_SIZE, BLACK, BLUE, WHITE
+from pellets import POWER_PELLET
+
+
+CHUNK_TILES = 16  # Chunks are CHUNK_TILES x CHUNK_TILES tiles
+
+
+class MazeChunk:
+    """One pre-rendered square of the maze"""
+
+    def __init__(self, walls, pellets, tile_x, tile_y):
+        self.tile_x = tile_x
+        self.tile_y = tile_y
+        self.columns = min(CHUNK_TILES, pellets.width - tile_x)
+        self.rows = min(CHUNK_TILES, pellets.height - tile_y)
+        self.rect = pygame.Rect(tile_x * TILE_SIZE, tile_y * TILE_SIZE,
+                                self.columns * TILE_SIZE, self.rows * TILE_SIZE)
+        self.surface = pygame.Surface(self.rect.size)
+        self.surface.fill(BLACK)
+
+        for y in range(self.rows):
+            row = walls[tile_y + y]
+            for x in range(self.columns):
+                if row[tile_x + x]:
+                    rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                    pygame.draw.rect(self.surface, BLUE, rect)
+
+        # The pellet bytes this chunk was drawn from, one bytes object per row
+        self.drawn = []
+        for y in range(self.rows):
+            start = (tile_y + y) * pellets.width + tile_x
+            row = bytes(pellets.kinds[start:start + self.columns])
+            self.drawn.append(row)
+            for x, kind in enumerate(row):
+                if kind:
+                    self.draw_pellet(x, y, kind)
+
+    def draw_pellet(self, x, y, kind):
+        center_x = x * TILE_SIZE + TILE_SIZE // 2
+        center_y = y * TILE_SIZE + TILE_SIZE // 2
+        if kind == POWER_PELLET:
+            pygame.draw.circle(self.surface, WHITE, (center_x, center_y), 8)  # Thicker power pellet
+        else:
+            pygame.draw.circle(self.surface, WHITE, (center_x, center_y), 3)
+
+    def sync(self, pellets):
+        """Redraw the pellet tiles that changed since this chunk was drawn; return their world rects"""
+        changed = []
+        for y in range(self.rows):
+            start = (self.tile_y + y) * pellets.width + self.tile_x
+            row = bytes(pellets.kinds[start:start + self.columns])
+            if row == self.drawn[y]:
+                continue
+            for x, (old, new) in enumerate(zip(self.drawn[y], row)):
+                if old != new:
+                    # Pellet tiles are never walls, so erasing is a plain fill
+                    tile = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                    self.surface.fill(BLACK, tile)
+                    if new:
+                        self.draw_pellet(x, y, new)
+                    changed.append(tile.move(self.rect.x, self.rect.y))
+            self.drawn[y] = row
+        return changed
+
+
+class MazeLayer:
+    """Walls and pellets rendered once into cached background chunks
+
+    Walls never change during a level, so each chunk is drawn a single time
+    when it first comes into view. Pellets are kept in sync with the
+    PelletStore by comparing the chunk's rows against the store, which only
+    happens when the store's version changes. Only the chunks that overlap
+    the visible area are ever blitted, and at most max_chunks are kept, so
+    drawing cost depends on the screen size rather than the map size.
+    """
+
+    def __init__(self, walls, pellets, max_chunks=64):
+        self.walls = walls
+        self.pellets = pellets
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> MazeChunk
+        self.version = pellets.version
+        self.map_rect = pygame.Rect(0, 0, pellets.width * TILE_SIZE, pellets.height * TILE_SIZE)
+
+    def chunk(self, chunk_x, chunk_y):
+        """Return a chunk, rendering it on first use"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        chunk = MazeChunk(self.walls, self.pellets, chunk_x * CHUNK_TILES, chunk_y * CHUNK_TILES)
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def sync(self):
+        """Bring rendered chunks up to date with eaten (or restored) pellets; return changed world rects"""
+        if self.version == self.pellets.version:
+            return []
+        changed = []
+        for chunk in self.chunks.values():
+            changed.extend(chunk.sync(self.pellets))
+        self.version = self.pellets.version
+        return changed
+
+    def blit(self, screen, world_rect, offset):
+        """Draw the maze under world_rect onto the screen, shifted by the camera offset
+
+        Anything outside the map is left black.
+        """
+        offset_x, offset_y = offset
+        if not self.map_rect.contains(world_rect):
+            screen.fill(BLACK, world_rect.move(-offset_x, -offset_y))
+        area = world_rect.clip(self.map_rect)
+        if not area.width or not area.height:
+            return
+        chunk_size = CHUNK_TILES * TILE_SIZE
+        for chunk_y in range(area.top // chunk_size, (area.bottom - 1) // chunk_size + 1):
+            for chunk_x in range(area.left // chunk_size, (area.right - 1) // chunk_size + 1):
+                chunk = self.chunk(chunk_x, chunk_y)
+                part = area.clip(chunk.rect)
+                source = part.move(-chunk.rect.x, -chunk.rect.y)
+                screen.blit(chunk.surface, (part.x - offset_x, part.y - offset_y), source)
@@ -0,0 +1,189 @@
+"""
+Maze navigation tables: per-tile exits and BFS maze distances
+"""
+
+from array import array
+from collections import OrderedDict
+
+
+# Moves in the order Ghost.choose_new_direction considers them
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# The exits of a tile are stored as a 4-bit mask over DIRECTIONS; these map
+# every mask to its directions so a lookup never allocates
+EXIT_DIRECTIONS = [tuple(d for bit, d in enumerate(DIRECTIONS) if mask & (1 << bit)) for mask in range(16)]
+
+# Distance of tiles that cannot be reached (also the cap on path length)
+UNREACHABLE = 0xFFFF
+
+# Upper bound on the tiles held by all cached distance tables together, so
+# large maps keep fewer tables instead of using unbounded memory
+CACHE_TILE_BUDGET = 4000000
+
+
+class MazeNavigator:
+    """Precomputed exits for every tile and lazily cached maze distances
+
+    Exits are computed once per map. Distance tables are built by a BFS from
+    a target tile the first time that target is asked for and kept in a
+    bounded LRU cache, so repeated queries are O(1) lookups of the true path
+    length through the maze.
+
+    On large maps a horizon limits how far each BFS goes; tiles beyond it
+    read as UNREACHABLE, which keeps a search proportional to the area
+    around the target instead of the whole map.
+
+    Exit masks and distance tables can also come precomputed from a level
+    file; stored tables are looked up before the cache and never evicted.
+    """
+
+    def __init__(self, walls, max_cached_targets=256, horizon=None, exit_masks=None, stored_tables=None):
+        self.height = len(walls)
+        self.width = len(walls[0]) if self.height else 0
+        self.horizon = horizon
+        tiles = max(1, self.width * self.height)
+        self.max_cached_targets = max(1, min(max_cached_targets, CACHE_TILE_BUDGET // tiles))
+        self.distance_tables = OrderedDict()
+        self.stored_tables = stored_tables if stored_tables is not None else {}  # target index -> table
+
+        width, height = self.width, self.height
+        # Index offsets of the neighbours behind each exit mask, for the BFS
+        offsets = [-1, 1, -width, width]
+        self.exit_offsets = [tuple(offsets[bit] for bit in range(4) if mask & (1 << bit)) for mask in range(16)]
+
+        if exit_masks is not None:
+            self.exit_masks = exit_masks
+            return
+        self.exit_masks = bytearray(width * height)
+        masks = self.exit_masks
+        # Bits follow DIRECTIONS: left, right, up, down
+        for y in range(height):
+            row = walls[y]
+            above = walls[y - 1] if y > 0 else None
+            below = walls[y + 1] if y + 1 < height else None
+            base = y * width
+            for x in range(width):
+                mask = 0
+                if x > 0 and not row[x - 1]:
+                    mask = 1
+                if x + 1 < width and not row[x + 1]:
+                    mask |= 2
+                if above is not None and not above[x]:
+                    mask |= 4
+                if below is not None and not below[x]:
+                    mask |= 8
+                masks[base + x] = mask
+
+    def exits(self, x, y):
+        """Return the directions that lead from (x, y) to an open tile"""
+        return EXIT_DIRECTIONS[self.exit_masks[y * self.width + x]]
+
+    def distances_from(self, x, y):
+        """Return the maze distance from every tile to (x, y), indexed by y * width + x"""
+        target = y * self.width + x
+        table = self.stored_tables.get(target)
+        if table is not None:
+            return table
+        table = self.distance_tables.get(target)
+        if table is not None:
+            self.distance_tables.move_to_end(target)
+            return table
+
+        table = self.bfs(target)
+        self.distance_tables[target] = table
+        if len(self.distance_tables) > self.max_cached_targets:
+            self.distance_tables.popitem(last=False)
+        return table
+
+    def bfs(self, source):
+        """Breadth-first search over open tiles starting at a tile index"""
+        table = array("H", [UNREACHABLE]) * (self.width * self.height)
+        table[source] = 0
+        masks = self.exit_masks
+        exit_offsets = self.exit_offsets
+        frontier = [source]
+        distance = 0
+        limit = UNREACHABLE - 1 if self.horizon is None else min(self.horizon, UNREACHABLE - 1)
+        while frontier and distance < limit:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                for offset in exit_offsets[masks[index]]:
+                    neighbour = index + offset
+                    if table[neighbour] == UNREACHABLE:
+                        table[neighbour] = distance
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        return table
+
+    def distance(self, start, target):
+        """Maze distance between two (x, y) tiles, UNREACHABLE if there is no path"""
+        table = self.distances_from(*target)
+        return table[start[1] * self.width + start[0]]
+
+
+class FlowField:
+    """Maze distances to Pacman shared by every ghost
+
+    The field is refreshed with a single BFS lookup only when Pacman moves to
+    a new tile. The best chase and flee exits are then worked out at most
+    once per tile until the next refresh, so the ghosts' pathing cost grows
+    with Pacman's tile changes rather than with ghosts times frames.
+    """
+
+    def __init__(self, navigator):
+        self.navigator = navigator
+        self.width = navigator.width
+        self.target = None
+        self.distances = None
+        self.chase_directions = {}
+        self.flee_directions = {}
+
+    def update(self, target):
+        """Point the field at Pacman's tile, recomputing only if it changed"""
+        if target != self.target:
+            self.target = target
+            self.distances = self.navigator.distances_from(*target)
+            self.chase_directions.clear()
+            self.flee_directions.clear()
+
+    def distance(self, x, y):
+        """Maze distance from (x, y) to Pacman"""
+        return self.distances[y * self.width + x]
+
+    def chase_direction(self, x, y):
+        """First exit of (x, y) that gets closest to Pacman, or None if none gets closer than unreachable"""
+        here = y * self.width + x
+        if here in self.chase_directions:
+            return self.chase_directions[here]
+        best_direction = None
+        best_distance = UNREACHABLE
+        for dx, dy in self.navigator.exits(x, y):
+            distance = self.distances[here + dy * self.width + dx]
+            if distance < best_distance:
+                best_distance = distance
+                best_direction = (dx, dy)
+        self.chase_directions[here] = best_direction
+        return best_direction
+
+    def flee_direction(self, x, y):
+        """First exit of (x, y) that gets farthest from Pacman
+
+        Returns None if all exits lead onto Pacman, or if (x, y) is cut off
+        from Pacman or beyond the search horizon, where every exit is equally good.
+        """
+        here = y * self.width + x
+        if here in self.flee_directions:
+            return self.flee_directions[here]
+        best_direction = None
+        best_distance = 0
+        if self.distances[here] == UNREACHABLE:
+            self.flee_directions[here] = None
+            return None
+        for dx, dy in self.navigator.exits(x, y):
+            distance = self.distances[here + dy * self.width + dx]
+            if distance > best_distance:
+                best_distance = distance
+                best_direction = (dx, dy)
+        self.flee_directions[here] = best_direction
+        return best_direction
@@ -2,15 +2,16 @@
 Pacman character class
 """
 
-import pygame
-import math
-from constants import TILE_SIZE, MAP_WIDTH, MAP_HEIGHT, YELLOW, BLACK
+from constants import TILE_SIZE, SUBPIXELS, TILE_UNITS
 
 
 class Pacman:
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
+        # Position in fixed-point units (SUBPIXELS per pixel), so movement, wall
+        # checks and grid lookups are integer-only and bit-exact on every machine;
+        # x and y give the position in pixels
+        self.fx = round(x * SUBPIXELS)
+        self.fy = round(y * SUBPIXELS)
         self.radius = TILE_SIZE // 2 - 3
         self.speed = 120  # pixels per second
         self.direction = (0, 0)  # (dx, dy)
@@ -21,6 +22,26 @@ class Pacman:
         self.power_timer = 0
         self.power_duration = 5.0  # Power mode lasts 5 seconds
         self.ghosts_eaten = 0  # Track how many ghosts have been eaten
+        self.prev_fx = self.fx  # Position before the last game update, for interpolated drawing
+        self.prev_fy = self.fy
+        self.step_dt = None  # The dt that step_units was worked out for
+        self.step_units = 0  # Distance moved per update, in units
+    
+    @property
+    def x(self):
+        return self.fx / SUBPIXELS
+    
+    @x.setter
+    def x(self, value):
+        self.fx = round(value * SUBPIXELS)
+    
+    @property
+    def y(self):
+        return self.fy / SUBPIXELS
+    
+    @y.setter
+    def y(self, value):
+        self.fy = round(value * SUBPIXELS)
         
     def update(self, dt, walls):
         # Update power mode timer
@@ -34,66 +55,60 @@ class Pacman:
         if self.next_direction != (0, 0):
             self.direction = self.next_direction
             
-        # Move Pacman
-        dx = self.direction[0] * self.speed * dt
-        dy = self.direction[1] * self.speed * dt
-        
-        new_x = self.x + dx
-        new_y = self.y + dy
+        # Move Pacman (the distance per update is only worked out again when dt changes)
+        if dt != self.step_dt:
+            self.step_dt = dt
+            self.step_units = round(self.speed * dt * SUBPIXELS)
+        new_x = self.fx + self.direction[0] * self.step_units
+        new_y = self.fy + self.direction[1] * self.step_units
         
         # Check wall collisions
         if not self.check_wall_collision(new_x, new_y, walls):
-            self.x = new_x
-            self.y = new_y
+            self.fx = new_x
+            self.fy = new_y
         else:
             # Stop movement if hitting a wall
             self.direction = (0, 0)
             # Snap to grid
-            self.x = round(self.x / TILE_SIZE) * TILE_SIZE
-            self.y = round(self.y / TILE_SIZE) * TILE_SIZE
+            self.fx = (self.fx + TILE_UNITS // 2) // TILE_UNITS * TILE_UNITS
+            self.fy = (self.fy + TILE_UNITS // 2) // TILE_UNITS * TILE_UNITS
     
     def can_change_direction(self, walls):
         # Check if Pacman is aligned with the grid
-        grid_x = round(self.x / TILE_SIZE) * TILE_SIZE
-        grid_y = round(self.y / TILE_SIZE) * TILE_SIZE
-        return abs(self.x - grid_x) < 5 and abs(self.y - grid_y) < 5
+        grid_x = (self.fx + TILE_UNITS // 2) // TILE_UNITS * TILE_UNITS
+        grid_y = (self.fy + TILE_UNITS // 2) // TILE_UNITS * TILE_UNITS
+        return abs(self.fx - grid_x) < 5 * SUBPIXELS and abs(self.fy - grid_y) < 5 * SUBPIXELS
     
     def check_wall_collision(self, x, y, walls):
+        """Check if Pacman would hit a wall at (x, y), given in fixed-point units"""
         # Get the tile coordinates
-        tile_x = int(x // TILE_SIZE)
-        tile_y = int(y // TILE_SIZE)
+        tile_x = x // TILE_UNITS
+        tile_y = y // TILE_UNITS
         
         # Check bounds
-        if tile_x < 0 or tile_x >= MAP_WIDTH or tile_y < 0 or tile_y >= MAP_HEIGHT:
+        if tile_x < 0 or tile_y < 0 or tile_y >= len(walls) or tile_x >= len(walls[0]):
             return True
             
         # Check if it's a wall
         return walls[tile_y][tile_x]
     
     def get_grid_position(self):
-        return (int(self.x // TILE_SIZE), int(self.y // TILE_SIZE))
+        return (self.fx // TILE_UNITS, self.fy // TILE_UNITS)
     
-    def draw(self, screen):
-        # Draw Pacman body - change color when in power mode
-        color = YELLOW if not self.power_mode else (255, 255, 100)  # Slightly different yellow when powered
-        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.radius)
-        
-        # Draw mouth
-        if self.direction != (0, 0):
-            dx, dy = self.direction
-            if dx == 0 and dy == 0:
-                dx = 1  # Default direction for mouth
-            
-            # Calculate mouth angle
-            angle = math.atan2(dy, dx)
-            mouth_angle = 0.4  # Half of mouth opening
-            
-            # Calculate mouth points
-            p1 = (int(self.x), int(self.y))
-            p2_x = int(self.x + self.radius * math.cos(angle - mouth_angle))
-            p2_y = int(self.y + self.radius * math.sin(angle - mouth_angle))
-            p3_x = int(self.x + self.radius * math.cos(angle + mouth_angle))
-            p3_y = int(self.y + self.radius * math.sin(angle + mouth_angle))
-            
-            # Draw mouth triangle
-            pygame.draw.polygon(screen, BLACK, [p1, (p2_x, p2_y), (p3_x, p3_y)])
+    def render_position(self, alpha=1.0):
+        """Where to draw Pacman: alpha of the way from the previous update's position to the current one"""
+        if alpha >= 1.0:
+            return self.x, self.y
+        return ((self.prev_fx + (self.fx - self.prev_fx) * alpha) / SUBPIXELS,
+                (self.prev_fy + (self.fy - self.prev_fy) * alpha) / SUBPIXELS)
+    
+    def draw(self, screen, sprites, offset=(0, 0), alpha=1.0):
+        """Blit Pacman's pre-rendered frame and return the screen rect that was drawn over
+
+        offset is the camera's world position, subtracted to get screen
+        coordinates; alpha interpolates between updates (see render_position).
+        """
+        # The frame changes color when in power mode and points the mouth along the direction
+        frame = sprites.pacman_frame(self.direction, self.power_mode)
+        x, y = self.render_position(alpha)
+        return sprites.blit(screen, frame, x - offset[0], y - offset[1])
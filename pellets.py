@@ -0,0 +1,83 @@
+"""
+Compact pellet storage shared by level generation, game logic and drawing
+"""
+
+# Tile contents stored in PelletStore.kinds
+EMPTY = 0
+PELLET = 1
+POWER_PELLET = 2
+
+
+class PelletStore:
+    """Pellets and power pellets for one map, one byte per tile
+
+    A live counter makes the level-completion check O(1), and the set of
+    remaining tile indices lets the renderer and agents visit only the
+    pellets that are still on the board instead of scanning the grid.
+    After load() the set is rebuilt lazily, the first time it is needed.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.kinds = bytearray(width * height)
+        self.live = set()  # Indices of tiles that still hold a pellet (None until rebuilt)
+        self.remaining = 0
+        self.version = 0  # Bumped on every change so caches can tell they are stale
+
+    def get(self, x, y):
+        """Return the kind of pellet at (x, y)"""
+        return self.kinds[y * self.width + x]
+
+    def place(self, x, y, kind):
+        """Put a pellet of the given kind at (x, y), replacing what was there"""
+        index = y * self.width + x
+        live = self.live
+        if self.kinds[index]:
+            self.remaining -= 1
+            if live is not None:
+                live.discard(index)
+        self.kinds[index] = kind
+        if kind:
+            self.remaining += 1
+            if live is not None:
+                live.add(index)
+        self.version += 1
+
+    def eat(self, x, y):
+        """Remove the pellet at (x, y) and return its kind (EMPTY if there was none)"""
+        index = y * self.width + x
+        kind = self.kinds[index]
+        if kind:
+            self.kinds[index] = EMPTY
+            self.remaining -= 1
+            if self.live is not None:
+                self.live.discard(index)
+            self.version += 1
+        return kind
+
+    def live_indices(self):
+        """Return the set of tile indices that hold a pellet"""
+        if self.live is None:
+            self.live = {index for index, kind in enumerate(self.kinds) if kind}
+        return self.live
+
+    def load(self, kinds, remaining=None):
+        """Overwrite every tile from a bytes-like grid of kinds (one buffer copy)
+
+        Pass the number of pellets in it if known; otherwise they are counted.
+        """
+        self.kinds[:] = kinds
+        self.remaining = remaining if remaining is not None else len(self.kinds) - self.kinds.count(EMPTY)
+        self.live = None
+        self.version += 1
+
+    def __len__(self):
+        return self.remaining
+
+    def __iter__(self):
+        """Yield (x, y, kind) for every remaining pellet"""
+        width = self.width
+        kinds = self.kinds
+        for index in self.live_indices():
+            yield index % width, index // width, kinds[index]
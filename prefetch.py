@@ -0,0 +1,79 @@
+"""
+Map preparation and background pre-generation of upcoming maps
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+from levels import LevelGenerator
+
+
+class PreparedMap:
+    """Everything a new map needs before play starts: layout, pellets, navigator and ghosts
+
+    Each map gets its own random generator, seeded from the game's map seed
+    and the map's index, so a map comes out the same whether it was built
+    ahead of time in the background or on demand. The generator is shared
+    with the map's ghosts, as LevelGenerator does.
+
+    With a level_file the map is loaded from disk instead; its size, Pacman
+    start and ghost spawns come from the file.
+    """
+
+    def __init__(self, level, index, width, height, map_seed, level_file=None):
+        self.level = level
+        self.index = index
+        self.rng = random.Random(f"{map_seed}:{index}")
+        generator = LevelGenerator(width, height, self.rng)
+        if level_file is not None:
+            self.walls, self.pellets, self.navigator = generator.load_map(level_file)
+            self.start = generator.pacman_start
+            spawns = generator.ghost_spawns
+        else:
+            self.walls, self.pellets, self.navigator = generator.generate_map(level)
+            self.start = (width // 2, height // 2)
+            spawns = None
+        self.width, self.height = generator.width, generator.height
+        self.ghosts = generator.create_ghosts(level, self.start[0], self.start[1], spawns)
+        # Build the distance table the flow field asks for first (Pacman's start tile)
+        self.navigator.distances_from(*self.start)
+
+
+class MapPrefetcher:
+    """Builds the maps a game may need next on a worker thread
+
+    Maps are keyed by (index, level): while map n is played, the game asks
+    for map n + 1 at every level it could go to next (the next level, or
+    level 1 after a restart), so there is a small pool of ready maps, one
+    per level. take() hands over a finished map in one step, waiting for it
+    only if it is still being built, and drops the maps nobody can use any
+    more.
+    """
+
+    def __init__(self, width, height, map_seed, level_files=None, workers=1):
+        self.width = width
+        self.height = height
+        self.map_seed = map_seed
+        self.level_files = level_files or {}  # level -> level file path
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="map-prefetch")
+        self.pending = {}  # (index, level) -> Future of a PreparedMap
+
+    def prefetch(self, index, level):
+        """Start building map index for level, unless it is already queued"""
+        key = (index, level)
+        if key not in self.pending:
+            self.pending[key] = self.executor.submit(PreparedMap, level, index, self.width, self.height,
+                                                     self.map_seed, self.level_files.get(level))
+
+    def take(self, index, level):
+        """Return the PreparedMap for (index, level), building it now if it was not prefetched"""
+        future = self.pending.pop((index, level), None)
+        for key in [key for key in self.pending if key[0] <= index]:
+            self.pending.pop(key).cancel()
+        if future is None:
+            return PreparedMap(level, index, self.width, self.height, self.map_seed, self.level_files.get(level))
+        return future.result()
+
+    def close(self):
+        """Stop the worker, abandoning maps that have not started building"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
@@ -0,0 +1,113 @@
+"""
+Per-phase frame-time profiler with a live overlay
+
+Opt in with python main.py --profile. The main loop and Game.update call
+lap() after each phase of a frame; the time since the previous lap is
+added to that phase's slot in a fixed-size ring buffer, so memory stays
+constant however long the game runs.
+"""
+
+import math
+import time
+from array import array
+from constants import WHITE, YELLOW
+
+
+# Upper edges of the histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS = [1, 2, 4, 8, 12, 16.7, 25, 33.3, 50, 100]
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600, refresh_frames=30):
+        self.capacity = capacity  # Frames kept in the ring buffers
+        self.refresh_frames = refresh_frames  # How often the overlay text is recomputed
+        self.phases = {}  # phase name -> array of seconds per frame, in first-seen order
+        self.totals = array("d", [0.0]) * capacity  # Whole-frame seconds
+        self.frame = 0  # Ring slot of the current frame
+        self.frames = 0  # Frames recorded in total
+        self.frame_start = self.last = time.perf_counter()
+        self.overlay_lines = []
+
+    def begin_frame(self):
+        """Start timing a frame; laps from here on are added to this frame's slot"""
+        frame = self.frame
+        for samples in self.phases.values():
+            samples[frame] = 0.0
+        self.frame_start = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase"""
+        now = time.perf_counter()
+        samples = self.phases.get(phase)
+        if samples is None:
+            samples = self.phases[phase] = array("d", [0.0]) * self.capacity
+        samples[self.frame] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """Record the frame's total time and move on to the next ring slot"""
+        self.totals[self.frame] = time.perf_counter() - self.frame_start
+        self.frame = (self.frame + 1) % self.capacity
+        self.frames += 1
+
+    def samples(self, phase=None):
+        """Recorded seconds per frame for a phase (or whole frames), oldest first"""
+        ring = self.totals if phase is None else self.phases[phase]
+        if self.frames < self.capacity:
+            return ring[:self.frames].tolist()
+        return (ring[self.frame:] + ring[:self.frame]).tolist()
+
+    def percentile(self, q, phase=None):
+        """Nearest-rank q-th percentile (0-100) in milliseconds"""
+        values = sorted(self.samples(phase))
+        if not values:
+            return 0.0
+        rank = min(len(values) - 1, max(0, math.ceil(q / 100.0 * len(values)) - 1))
+        return values[rank] * 1000.0
+
+    def draw(self, screen, text_cache, position=None):
+        """Draw the p50/p99 overlay and return the screen rects it covered
+
+        The numbers are recomputed every refresh_frames frames, so the text
+        stays readable and the overlay itself costs little.
+        """
+        if self.frames % self.refresh_frames == 0 or not self.overlay_lines:
+            lines = [f"frame  p50 {self.percentile(50):5.2f}  p99 {self.percentile(99):5.2f} ms"]
+            for phase in self.phases:
+                lines.append(f"{phase:<10} {self.percentile(50, phase):5.2f}  {self.percentile(99, phase):5.2f}")
+            self.overlay_lines = lines
+
+        x, y = position if position is not None else (10, screen.get_height() - 18 * len(self.overlay_lines) - 10)
+        rects = []
+        for i, line in enumerate(self.overlay_lines):
+            text = text_cache.render(line, 20, YELLOW if i == 0 else WHITE)
+            rects.append(screen.blit(text, (x, y + 18 * i)))
+        return rects
+
+    def histogram(self, width=40):
+        """Text report of per-phase percentiles and a histogram of frame times"""
+        if not self.frames:
+            return "No frames recorded"
+        lines = [f"Last {min(self.frames, self.capacity)} of {self.frames} frames (ms):",
+                 f"{'phase':<12}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}"]
+        for phase in [None] + list(self.phases):
+            name = "frame" if phase is None else phase
+            lines.append(f"{name:<12}" + "".join(f"{self.percentile(q, phase):8.2f}" for q in (50, 90, 99, 100)))
+
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for seconds in self.samples():
+            ms = seconds * 1000.0
+            bucket = 0
+            while bucket < len(HISTOGRAM_BUCKETS) and ms > HISTOGRAM_BUCKETS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        most = max(counts)
+        lines.append("Frame time histogram:")
+        lower = 0
+        for bucket, count in enumerate(counts):
+            label = f"{lower:g}-{HISTOGRAM_BUCKETS[bucket]:g}" if bucket < len(HISTOGRAM_BUCKETS) else f">{lower:g}"
+            bar = "#" * (count * width // most if most else 0)
+            lines.append(f"{label:>12} ms {count:6d} {bar}")
+            if bucket < len(HISTOGRAM_BUCKETS):
+                lower = HISTOGRAM_BUCKETS[bucket]
+        return "\n".join(lines)
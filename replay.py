@@ -0,0 +1,153 @@
+"""
+Deterministic input recording and headless replay
+
+A game is fully determined by its seed, map size, level files, fixed dt
+and the actions applied on each tick. InputRecorder captures those while playing (or while
+an agent drives a headless run); replay() re-executes a recording headless
+as fast as possible and checks that it ends in the same state.
+
+    python replay.py recording.json --repeat 100
+"""
+
+import argparse
+import json
+from constants import FPS, MAP_WIDTH, MAP_HEIGHT
+from game import Game
+from headless import HeadlessRunner, ScriptedInput
+
+
+def final_state(game):
+    """The parts of a game's state a replay is expected to reproduce exactly"""
+    return {
+        "score": game.pacman.score,
+        "lives": game.pacman.lives,
+        "level": game.level,
+        "pellets_eaten": game.pellets_eaten,
+        "ghosts_eaten": game.pacman.ghosts_eaten,
+        "game_over": game.game_over,
+        "win": game.win,
+        "pacman": [game.pacman.x, game.pacman.y],
+        "ghosts": [[ghost.x, ghost.y, ghost.eaten] for ghost in game.ghosts],
+    }
+
+
+def encode_action(action):
+    return list(action) if isinstance(action, tuple) else action
+
+
+def decode_action(action):
+    return tuple(action) if isinstance(action, list) else action
+
+
+class Recording:
+    def __init__(self, seed, dt=1.0 / FPS, width=MAP_WIDTH, height=MAP_HEIGHT, actions=None, ticks=0, final=None,
+                 level_files=None):
+        self.seed = seed
+        self.dt = dt
+        self.width = width
+        self.height = height
+        self.actions = actions if actions is not None else []  # (tick, action) pairs
+        self.ticks = ticks
+        self.final = final
+        self.level_files = level_files or {}  # level -> level file path, as for Game
+
+    def to_dict(self):
+        return {
+            "seed": self.seed,
+            "dt": self.dt,
+            "width": self.width,
+            "height": self.height,
+            "ticks": self.ticks,
+            "actions": [[tick, encode_action(action)] for tick, action in self.actions],
+            "final": self.final,
+            "level_files": {str(level): path for level, path in self.level_files.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["seed"], data["dt"], data["width"], data["height"],
+                   [(tick, decode_action(action)) for tick, action in data["actions"]],
+                   data["ticks"], data.get("final"),
+                   {int(level): path for level, path in data.get("level_files", {}).items()})
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class InputRecorder:
+    """Logs the actions applied to a game, tick by tick, at a fixed dt
+
+    Use record() from a game loop, or wrap an input source with wrap() to
+    record a headless run.
+    """
+
+    def __init__(self, game, dt=1.0 / FPS):
+        self.game = game
+        self.recording = Recording(game.seed, dt, game.map_width, game.map_height, level_files=game.level_files)
+
+    def record(self, tick, action):
+        if action is not None:
+            self.recording.actions.append((tick, action))
+
+    def wrap(self, input_source):
+        def recorded(game, tick):
+            action = input_source(game, tick)
+            for each in action if isinstance(action, list) else [action]:
+                self.record(tick, each)
+            return action
+        return recorded
+
+    def finish(self, ticks):
+        """Close the recording after the given number of ticks and capture the final state"""
+        self.recording.ticks = ticks
+        self.recording.final = final_state(self.game)
+        return self.recording
+
+
+def replay(recording, verify=True):
+    """Re-run a recording headless; return the run summary plus whether the final state matched"""
+    game = Game(recording.width, recording.height, recording.seed, level_files=recording.level_files)
+    runner = HeadlessRunner(game, recording.dt, ScriptedInput(recording.actions))
+    result = runner.run(recording.ticks, stop_on_end=False)
+    result["final"] = final_state(game)
+    if verify and recording.final is not None:
+        result["matches"] = result["final"] == recording.final
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded Pacman game headless")
+    parser.add_argument("recording", help="JSON recording written by main.py --record")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times to re-run it")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.recording)
+    mismatches = 0
+    total_ticks = 0
+    total_time = 0.0
+    for _ in range(args.repeat):
+        result = replay(recording)
+        total_ticks += result["ticks"]
+        total_time += result["elapsed"]
+        if result.get("matches") is False:
+            mismatches += 1
+
+    simulated = total_ticks * recording.dt
+    print(f"Replayed {args.repeat} x {recording.ticks} ticks in {total_time:.2f}s "
+          f"({simulated / total_time if total_time else float('inf'):.0f}x real time)")
+    print(f"Final score: {result['score']}  Level: {result['level']}  Lives: {result['lives']}")
+    if recording.final is None:
+        print("Recording has no final state to verify against")
+    else:
+        print("Verified: all runs match" if mismatches == 0 else f"MISMATCH in {mismatches} run(s)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""
+Time-sliced scheduling of ghost AI decisions
+"""
+
+import time
+from collections import deque
+
+
+class AIScheduler:
+    """Spreads ghost decisions across frames and caps how many are made per step
+
+    A ghost asks for a decision when its direction timer runs out or it is
+    about to hit a wall. While the step's budget lasts the decision is made
+    on the spot; after that the ghost is queued and keeps its old direction
+    (stopping at the wall if it meets one) until a later step serves the
+    queue, oldest request first, before any new ones.
+
+    max_decisions is counted, so games stay reproducible. time_budget, in
+    seconds per step, additionally stops decisions once the step has used
+    that much time; it keeps frame times flat on slow machines, but which
+    frame a decision lands on then depends on the machine, so seeded runs
+    and recordings no longer replay exactly.
+    """
+
+    def __init__(self, max_decisions=8, time_budget=None):
+        self.max_decisions = max_decisions
+        self.time_budget = time_budget
+        self.queue = deque()  # (ghost, restart_timer) waiting for a decision, oldest first
+        self.decisions = 0  # Decisions made in the current step
+        self.deadline = None  # perf_counter() time the current step's budget runs out
+        self.deferred = 0  # Requests that had to wait for a later step, in total
+
+    def clear(self):
+        """Forget all queued requests"""
+        for ghost, _ in self.queue:
+            ghost.decision_pending = False
+        self.queue.clear()
+
+    def reset(self, ghosts):
+        """Start a new map: forget queued requests and stagger the ghosts' decision timers
+
+        Ghost i of n makes its first timed decision i/n of the way through
+        its interval, so the ghosts don't all re-decide on the same step.
+        """
+        self.clear()
+        count = len(ghosts)
+        for i, ghost in enumerate(ghosts):
+            ghost.last_direction_change = ghost.direction_timer - ghost.direction_change_interval * i / count
+
+    def begin_step(self, flow_field, pacman_power_mode):
+        """Open a new step's budget and serve queued requests with it"""
+        self.decisions = 0
+        if self.time_budget is not None:
+            self.deadline = time.perf_counter() + self.time_budget
+        queue = self.queue
+        while queue and self.has_budget():
+            ghost, restart_timer = queue.popleft()
+            ghost.decision_pending = False
+            if not ghost.eaten:
+                self.decide(ghost, flow_field, pacman_power_mode, restart_timer)
+
+    def has_budget(self):
+        """Whether another decision fits into the current step"""
+        if self.max_decisions is not None and self.decisions >= self.max_decisions:
+            return False
+        return self.deadline is None or time.perf_counter() < self.deadline
+
+    def request(self, ghost, flow_field, pacman_power_mode, restart_timer=True):
+        """Let the ghost decide now if the budget allows, or queue it; return whether it decided
+
+        Pass restart_timer=False for decisions that should leave the ghost's
+        direction timer running, as Ghost.update does after running into a wall.
+        """
+        if ghost.decision_pending:
+            return False
+        if self.has_budget():
+            self.decide(ghost, flow_field, pacman_power_mode, restart_timer)
+            return True
+        ghost.decision_pending = True
+        self.queue.append((ghost, restart_timer))
+        self.deferred += 1
+        return False
+
+    def decide(self, ghost, flow_field, pacman_power_mode, restart_timer=True):
+        """Make one decision for a ghost and, unless told otherwise, restart its direction timer"""
+        # Queued ghosts decide before their own update refreshes this, so set it from the current power mode
+        ghost.vulnerable = pacman_power_mode
+        ghost.choose_new_direction(flow_field, pacman_power_mode)
+        if restart_timer:
+            ghost.last_direction_change = ghost.direction_timer
+        self.decisions += 1
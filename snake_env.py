@@ -0,0 +1,280 @@
+"""
+Headless Snake environments for training agents and balance sweeps
+
+SnakeEnv wraps one snake_game.Game. VectorSnakeEnv steps thousands of
+boards at once with NumPy: every board, snake body and free-cell set is a
+row of a 2-D array, so a step is a fixed number of vectorized operations
+whatever the number of boards.
+
+Both use the Gymnasium API (reset returns (observation, info), step
+returns (observation, reward, terminated, truncated, info)) without
+depending on it. Observations are boards of cell codes:
+
+    0 empty, 1 body, 2 head, 3 food
+
+    python snake_env.py --envs 4096 --steps 2000
+"""
+
+import argparse
+import time
+import numpy as np
+import snake_game
+
+
+# Action codes accepted by step(), the same as env.PacmanEnv: 0 keeps the current direction
+ACTIONS = [None, (-1, 0), (1, 0), (0, -1), (0, 1)]
+OPPOSITE = np.array([0, 2, 1, 4, 3], dtype=np.int8)  # Action code of the reverse direction
+ACTION_DX = np.array([0, -1, 1, 0, 0], dtype=np.int64)
+ACTION_DY = np.array([0, 0, 0, -1, 1], dtype=np.int64)
+RIGHT = 2
+
+EMPTY, BODY, HEAD, FOOD = range(4)
+FOOD_REWARD = 10  # Points per food, as in snake_game.Game
+
+
+class SnakeEnv:
+    """One Snake game stepped without a window
+
+    The observation array is allocated once and updated in place every
+    step, so keep a copy if you need an older one.
+    """
+
+    def __init__(self, width=snake_game.GRID_WIDTH, height=snake_game.GRID_HEIGHT, max_steps=None):
+        self.width = width
+        self.height = height
+        self.max_steps = max_steps  # Episodes past this many steps are truncated
+        self.observation = np.zeros((height, width), dtype=np.uint8)
+        self.game = None
+        self.occupancy = None  # Zero-copy view of the snake's occupancy grid
+        self.snake_occupancy = None  # The bytearray that occupancy is a view of
+        self.steps = 0
+
+    def reset(self, seed=None):
+        """Start a new game and return (observation, info)"""
+        self.game = snake_game.Game(self.width, self.height, seed)
+        self.steps = 0
+        return self.observe(), self.info()
+
+    def step(self, action):
+        """Apply an action code (or direction tuple), move the snake one cell and score the result"""
+        game = self.game
+        direction = action if isinstance(action, tuple) else ACTIONS[action]
+        if direction is not None:
+            game.snake.change_direction(direction)
+        score = game.score
+        game.update()
+        self.steps += 1
+        terminated = game.game_over
+        truncated = not terminated and self.max_steps is not None and self.steps >= self.max_steps
+        return self.observe(), game.score - score, terminated, truncated, self.info()
+
+    def observe(self):
+        """Bring the observation array up to date with the game and return it"""
+        game = self.game
+        snake = game.snake
+        if snake.occupancy is not self.snake_occupancy:
+            # A restart brings a new snake; view its grid in place, nothing is copied
+            self.snake_occupancy = snake.occupancy
+            self.occupancy = np.frombuffer(snake.occupancy, dtype=np.uint8).reshape(self.height, self.width)
+        obs = self.observation
+        np.minimum(self.occupancy, BODY, out=obs)
+        head_x, head_y = snake.body[0]
+        if 0 <= head_x < self.width and 0 <= head_y < self.height:
+            obs[head_y, head_x] = HEAD
+        if game.food.position is not None:
+            food_x, food_y = game.food.position
+            obs[food_y, food_x] = FOOD
+        return obs
+
+    def info(self):
+        return {"score": self.game.score, "length": len(self.game.snake.body)}
+
+
+class VectorSnakeEnv:
+    """num_envs Snake boards stepped in lockstep with NumPy
+
+    Per board, board holds the cell codes (it doubles as the occupancy grid
+    and is the observation, without copying), bodies is a ring buffer of
+    cell indices with the head at heads, and free_cells / free_slots form
+    the same packed free-cell set as snake_game.CellSet, so food is placed
+    in O(1) however full a board is. Cells are indexed y * width + x.
+
+    The rules match snake_game.Game, except that boards which finish are
+    reset at once: the step returns their first observation of the new
+    episode, flagged by terminated (with the final score in info).
+    """
+
+    def __init__(self, num_envs, width=snake_game.GRID_WIDTH, height=snake_game.GRID_HEIGHT, seed=None,
+                 max_steps=None):
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.max_steps = max_steps  # Episodes past this many steps are truncated
+        self.rng = np.random.default_rng(seed)
+        n, cells = num_envs, width * height
+        self.boards = np.zeros((n, cells), dtype=np.uint8)
+        self.bodies = np.zeros((n, cells), dtype=np.int32)  # Ring buffers of body cells, tail to head
+        self.heads = np.zeros(n, dtype=np.int64)  # Ring index of the head
+        self.lengths = np.zeros(n, dtype=np.int64)
+        self.free_cells = np.zeros((n, cells), dtype=np.int32)  # Free cells packed at the front
+        self.free_slots = np.zeros((n, cells), dtype=np.int32)  # Slot of each cell in free_cells, -1 if covered
+        self.free_counts = np.zeros(n, dtype=np.int64)
+        self.directions = np.zeros(n, dtype=np.int8)  # Action code of the current direction
+        self.grow = np.zeros(n, dtype=bool)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.rows = np.arange(n)
+
+    @property
+    def observation(self):
+        """The boards as a (num_envs, height, width) view of cell codes"""
+        return self.boards.reshape(self.num_envs, self.height, self.width)
+
+    def reset(self, seed=None):
+        """Start every board over and return (observation, info)"""
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.reset_boards(self.rows)
+        return self.observation, self.info()
+
+    def reset_boards(self, games):
+        """Start the given boards over with a three-cell snake in the middle, heading right"""
+        if not len(games):
+            return
+        cells = self.width * self.height
+        self.boards[games] = EMPTY
+        self.free_cells[games] = np.arange(cells, dtype=np.int32)
+        self.free_slots[games] = np.arange(cells, dtype=np.int32)
+        self.free_counts[games] = cells
+        start = (self.height // 2) * self.width + self.width // 2
+        for i, cell in enumerate((start - 2, start - 1, start)):
+            cell = np.full(len(games), cell)
+            self.bodies[games, i] = cell
+            self.boards[games, cell] = BODY
+            self.take_free(games, cell)
+        self.boards[games, start] = HEAD
+        self.heads[games] = 2
+        self.lengths[games] = 3
+        self.directions[games] = RIGHT
+        self.grow[games] = False
+        self.scores[games] = 0
+        self.steps[games] = 0
+        self.place_food(games)
+
+    def take_free(self, games, cells):
+        """Remove one cell per game from the free-cell sets (each game at most once per call)"""
+        slots = self.free_slots[games, cells]
+        last_slots = self.free_counts[games] - 1
+        last = self.free_cells[games, last_slots]
+        self.free_cells[games, slots] = last
+        self.free_slots[games, last] = slots
+        self.free_slots[games, cells] = -1
+        self.free_counts[games] = last_slots
+
+    def give_free(self, games, cells):
+        """Add one cell per game to the free-cell sets (each game at most once per call)"""
+        counts = self.free_counts[games]
+        self.free_cells[games, counts] = cells
+        self.free_slots[games, cells] = counts
+        self.free_counts[games] = counts + 1
+
+    def place_food(self, games):
+        """Put food on a random free cell of each game; return the games whose board is full"""
+        counts = self.free_counts[games]
+        full = counts == 0
+        picks = (self.rng.random(len(games)) * counts).astype(np.int64)
+        food = self.free_cells[games, np.minimum(picks, np.maximum(counts - 1, 0))]
+        self.food[games] = food
+        self.boards[games[~full], food[~full]] = FOOD
+        return games[full]
+
+    def step(self, actions=None):
+        """Advance every board by one move; actions is an array of action codes (None keeps going)"""
+        width, height = self.width, self.height
+        cells = width * height
+        rows = self.rows
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turn = (actions != 0) & (actions != OPPOSITE[self.directions])
+            self.directions = np.where(turn, actions, self.directions)
+
+        heads = self.bodies[rows, self.heads]
+        x = heads % width + ACTION_DX[self.directions]
+        y = heads // width + ACTION_DY[self.directions]
+        inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        new_heads = np.where(inside, y * width + x, 0)
+
+        # The tail moves off first unless the snake grows, so the head may follow into its cell
+        moving = np.flatnonzero(~self.grow)
+        tails = self.bodies[moving, (self.heads[moving] - self.lengths[moving] + 1) % cells]
+        self.boards[moving, tails] = EMPTY
+        self.give_free(moving, tails)
+        self.lengths += self.grow
+        self.grow[:] = False
+
+        targets = self.boards[rows, new_heads]
+        crashed = ~inside | (inside & ((targets == BODY) | (targets == HEAD)))
+        alive = np.flatnonzero(~crashed)
+        ate = targets[alive] == FOOD
+
+        # Move the head in on the boards that go on
+        live_heads = new_heads[alive]
+        self.boards[alive, heads[alive]] = BODY
+        self.boards[alive, live_heads] = HEAD
+        self.take_free(alive, live_heads)
+        self.heads[alive] = (self.heads[alive] + 1) % cells
+        self.bodies[alive, self.heads[alive]] = live_heads
+
+        eaters = alive[ate]
+        self.grow[eaters] = True
+        self.scores[eaters] += FOOD_REWARD
+        rewards = np.zeros(self.num_envs, dtype=np.int64)
+        rewards[eaters] = FOOD_REWARD
+        full = self.place_food(eaters)
+        self.steps += 1
+
+        terminated = crashed
+        terminated[full] = True
+        if self.max_steps is not None:
+            truncated = ~terminated & (self.steps >= self.max_steps)
+        else:
+            truncated = np.zeros(self.num_envs, dtype=bool)
+        info = {"final_scores": self.scores.copy()}
+        finished = np.flatnonzero(terminated | truncated)
+        self.reset_boards(finished)
+        return self.observation, rewards, terminated, truncated, info
+
+    def info(self):
+        return {"scores": self.scores, "lengths": self.lengths}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure VectorSnakeEnv throughput with random actions")
+    parser.add_argument("--envs", type=int, default=4096, help="boards stepped together")
+    parser.add_argument("--steps", type=int, default=2000, help="steps per board")
+    parser.add_argument("--width", type=int, default=snake_game.GRID_WIDTH)
+    parser.add_argument("--height", type=int, default=snake_game.GRID_HEIGHT)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    env = VectorSnakeEnv(args.envs, args.width, args.height, args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    episodes = 0
+    total_score = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, terminated, _, info = env.step(rng.integers(0, len(ACTIONS), args.envs, dtype=np.int8))
+        episodes += int(terminated.sum())
+        total_score += int(info["final_scores"][terminated].sum())
+    elapsed = time.perf_counter() - start
+
+    steps = args.envs * args.steps
+    print(f"{steps} board steps in {elapsed:.2f}s: {steps / elapsed:,.0f} steps/s")
+    if episodes:
+        print(f"{episodes} episodes finished, mean score {total_score / episodes:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ Control the snake with arrow keys or WASD to eat food and grow longer.
 import pygame
 import sys
 import random
+from array import array
+from collections import deque
+from hud import TextCache
 
 # Constants
 GRID_SIZE = 20
@@ -24,28 +27,94 @@ WHITE = (255, 255, 255)
 DARK_GREEN = (0, 150, 0)
 BLUE = (0, 0, 255)
 
+class CellSet:
+    """Set of cell indices with O(1) add, remove and random choice
+
+    The members are packed at the front of an array; each cell remembers
+    its slot, so a removal moves the last member into the gap.
+    """
+    
+    def __init__(self, size, full=False):
+        self.cells = array("i", range(size)) if full else array("i")
+        self.slots = array("i", range(size)) if full else array("i", [-1]) * size  # -1 = not a member
+    
+    def add(self, cell):
+        if self.slots[cell] < 0:
+            self.slots[cell] = len(self.cells)
+            self.cells.append(cell)
+    
+    def remove(self, cell):
+        slot = self.slots[cell]
+        if slot >= 0:
+            last = self.cells.pop()
+            if last != cell:
+                self.cells[slot] = last
+                self.slots[last] = slot
+            self.slots[cell] = -1
+    
+    def choice(self, rng):
+        """Return a random member"""
+        return self.cells[rng.randrange(len(self.cells))]
+    
+    def __contains__(self, cell):
+        return self.slots[cell] >= 0
+    
+    def __len__(self):
+        return len(self.cells)
+
 class Snake:
-    def __init__(self):
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        # How many body segments cover each cell (y * width + x); more than
+        # one only where the head has just run into the body
+        self.occupancy = bytearray(width * height)
+        self.free = CellSet(width * height, full=True)  # Cells no segment covers, for placing food
+        self.body = deque()  # Head first
         # Start the snake in the center of the screen
-        start_x = GRID_WIDTH // 2
-        start_y = GRID_HEIGHT // 2
-        self.body = [(start_x, start_y), (start_x - 1, start_y), (start_x - 2, start_y)]
+        start_x = width // 2
+        start_y = height // 2
+        self.set_body([(start_x, start_y), (start_x - 1, start_y), (start_x - 2, start_y)])
         self.direction = (1, 0)  # Moving right initially
         self.grow = False
+    
+    def set_body(self, cells):
+        """Replace the body with the given cells, head first, rebuilding the occupancy grid"""
+        for x, y in self.body:
+            self.vacate(x, y)
+        self.body = deque(cells)
+        for x, y in self.body:
+            self.occupy(x, y)
+    
+    def occupy(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            cell = y * self.width + x
+            if not self.occupancy[cell]:
+                self.free.remove(cell)
+            self.occupancy[cell] += 1
+    
+    def vacate(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            cell = y * self.width + x
+            self.occupancy[cell] -= 1
+            if not self.occupancy[cell]:
+                self.free.add(cell)
         
     def move(self):
         """Move the snake in the current direction"""
         head_x, head_y = self.body[0]
         new_head = (head_x + self.direction[0], head_y + self.direction[1])
         
-        # Add new head
-        self.body.insert(0, new_head)
-        
-        # Remove tail unless growing
+        # Remove tail unless growing (first, so the head may follow into the freed cell)
         if not self.grow:
-            self.body.pop()
+            tail_x, tail_y = self.body.pop()
+            self.vacate(tail_x, tail_y)
         else:
             self.grow = False
+        
+        # Add new head
+        self.body.appendleft(new_head)
+        self.occupy(*new_head)
     
     def change_direction(self, new_direction):
         """Change the snake's direction (prevent 180-degree turns)"""
@@ -58,12 +127,12 @@ class Snake:
         head_x, head_y = self.body[0]
         
         # Check wall collision
-        if (head_x < 0 or head_x >= GRID_WIDTH or 
-            head_y < 0 or head_y >= GRID_HEIGHT):
+        if (head_x < 0 or head_x >= self.width or 
+            head_y < 0 or head_y >= self.height):
             return True
         
-        # Check self collision
-        if (head_x, head_y) in self.body[1:]:
+        # Check self collision: the head shares its cell with another segment
+        if self.occupancy[head_y * self.width + head_x] > 1:
             return True
         
         return False
@@ -87,36 +156,48 @@ class Snake:
                 pygame.draw.rect(screen, WHITE, rect, 1)
 
 class Food:
-    def __init__(self):
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, rng=None):
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else random
         self.position = self.generate_position()
     
     def generate_position(self):
         """Generate a random position for the food"""
-        x = random.randint(0, GRID_WIDTH - 1)
-        y = random.randint(0, GRID_HEIGHT - 1)
+        x = self.rng.randint(0, self.width - 1)
+        y = self.rng.randint(0, self.height - 1)
         return (x, y)
     
-    def respawn(self, snake_body):
-        """Respawn food at a new position (avoiding snake body)"""
-        while True:
-            self.position = self.generate_position()
-            if self.position not in snake_body:
-                break
+    def respawn(self, snake):
+        """Respawn food at a random cell the snake doesn't cover (None once the board is full)
+
+        Picks straight from the snake's free-cell set, so it takes the same
+        time however full the board is.
+        """
+        if not snake.free:
+            self.position = None
+            return
+        cell = snake.free.choice(self.rng)
+        self.position = (cell % self.width, cell // self.width)
     
     def draw(self, screen):
         """Draw the food on the screen"""
+        if self.position is None:
+            return
         x, y = self.position
         rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
         pygame.draw.rect(screen, RED, rect)
         pygame.draw.rect(screen, WHITE, rect, 2)
 
 class Game:
-    def __init__(self):
-        self.snake = Snake()
-        self.food = Food()
-        self.score = 0
-        self.game_over = False
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        # Board size in cells; snake_env.py runs games of any size without a window
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)  # Food placement, so a seed reproduces a game
         self.high_score = 0
+        self.restart()
+        self.text_cache = TextCache()  # Fonts and HUD text are rendered once and reused
         
     def update(self):
         """Update the game state"""
@@ -127,18 +208,22 @@ class Game:
             # Check for food collision
             if self.snake.eat_food(self.food.position):
                 self.score += 10
-                self.food.respawn(self.snake.body)
+                self.food.respawn(self.snake)
+                if self.food.position is None:
+                    # The snake fills the board; there is nowhere left to go
+                    self.game_over = True
             
             # Check for collisions
             if self.snake.check_collision():
                 self.game_over = True
-                if self.score > self.high_score:
-                    self.high_score = self.score
+            if self.game_over and self.score > self.high_score:
+                self.high_score = self.score
     
     def restart(self):
         """Restart the game"""
-        self.snake = Snake()
-        self.food = Food()
+        self.snake = Snake(self.width, self.height)
+        self.food = Food(self.width, self.height, self.rng)
+        self.food.respawn(self.snake)  # Never start with the food under the snake
         self.score = 0
         self.game_over = False
     
@@ -158,28 +243,26 @@ class Game:
         self.food.draw(screen)
         
         # Draw UI
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f"Score: {self.score}", True, WHITE)
+        text_cache = self.text_cache
+        score_text = text_cache.render(f"Score: {self.score}", 36, WHITE)
         screen.blit(score_text, (10, 10))
         
-        high_score_text = font.render(f"High Score: {self.high_score}", True, WHITE)
+        high_score_text = text_cache.render(f"High Score: {self.high_score}", 36, WHITE)
         screen.blit(high_score_text, (10, 50))
         
         # Draw game over message
         if self.game_over:
-            game_over_font = pygame.font.Font(None, 48)
-            game_over_text = game_over_font.render("GAME OVER!", True, RED)
+            game_over_text = text_cache.render("GAME OVER!", 48, RED)
             text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 30))
             screen.blit(game_over_text, text_rect)
             
-            restart_text = font.render("Press SPACE to restart or ESC to quit", True, WHITE)
+            restart_text = text_cache.render("Press SPACE to restart or ESC to quit", 36, WHITE)
             restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
             screen.blit(restart_text, restart_rect)
         
         # Draw instructions
         if not self.game_over:
-            instruction_font = pygame.font.Font(None, 24)
-            instruction_text = instruction_font.render("Use Arrow Keys or WASD to move", True, WHITE)
+            instruction_text = text_cache.render("Use Arrow Keys or WASD to move", 24, WHITE)
             screen.blit(instruction_text, (10, SCREEN_HEIGHT - 30))
 
 def main():
@@ -0,0 +1,162 @@
+"""
+Compact snapshots of a Game's state for rollback, retries and search
+
+    python snapshot.py --count 100000
+"""
+
+import argparse
+import struct
+import time
+from constants import MAP_WIDTH, MAP_HEIGHT
+
+
+# level, map_index, total_pellets, pellets_eaten, game_over, win, life_lost_timer, level_complete_timer
+GAME_FORMAT = "iiii??dd"
+# fx, fy (fixed-point units), direction, next_direction, score, lives, power_mode, power_timer, ghosts_eaten
+PACMAN_FORMAT = "qqbbbbii?di"
+# fx, fy (fixed-point units), direction, next_direction, direction_timer, last_direction_change, vulnerable, eaten
+GHOST_FORMAT = "qqbbbbdd??"
+
+_layouts = {}  # ghost count -> struct.Struct for the whole packed record
+
+
+def layout(ghost_count):
+    """Return the struct that packs a game with the given number of ghosts"""
+    packer = _layouts.get(ghost_count)
+    if packer is None:
+        packer = struct.Struct("=" + GAME_FORMAT + PACMAN_FORMAT + GHOST_FORMAT * ghost_count)
+        _layouts[ghost_count] = packer
+    return packer
+
+
+class GameSnapshot:
+    """Everything needed to put a Game back exactly as it was
+
+    The numbers and flags of the game, Pacman and every ghost are packed
+    into one bytes record, and the pellet grid is a plain bytes copy of
+    PelletStore.kinds, so taking and restoring a snapshot copies buffers
+    rather than Python objects. Per-map data that never changes during a
+    level (walls, navigator) and the actor objects themselves are kept by
+    reference, which lets a snapshot taken on an earlier level be restored
+    too. The two message strings are immutable and shared as well.
+    """
+
+    __slots__ = ("data", "pellet_kinds", "remaining", "messages", "walls", "pellets",
+                 "navigator", "flow_field", "start", "pacman", "ghosts", "ai_queue", "map_rng", "rng_state",
+                 "map_rng_state")
+
+    def __init__(self, game, include_rng=True):
+        pacman = game.pacman
+        values = [game.level, game.map_index, game.total_pellets, game.pellets_eaten, game.game_over, game.win,
+                  game.life_lost_timer, game.level_complete_timer,
+                  pacman.fx, pacman.fy, pacman.direction[0], pacman.direction[1],
+                  pacman.next_direction[0], pacman.next_direction[1], pacman.score, pacman.lives,
+                  pacman.power_mode, pacman.power_timer, pacman.ghosts_eaten]
+        for ghost in game.ghosts:
+            values += (ghost.fx, ghost.fy, ghost.direction[0], ghost.direction[1],
+                       ghost.next_direction[0], ghost.next_direction[1],
+                       ghost.direction_timer, ghost.last_direction_change, ghost.vulnerable, ghost.eaten)
+        self.data = layout(len(game.ghosts)).pack(*values)
+
+        pellets = game.pellets
+        self.pellet_kinds = bytes(pellets.kinds)
+        self.remaining = pellets.remaining
+        self.messages = (game.life_lost_message, game.level_complete_message)
+
+        self.walls = game.walls
+        self.pellets = pellets
+        self.navigator = game.navigator
+        self.flow_field = game.flow_field
+        self.start = game.start
+        self.pacman = pacman
+        self.ghosts = tuple(game.ghosts)
+        # Ghosts waiting on the AI scheduler, as (index into ghosts, restart_timer), oldest first
+        positions = {id(ghost): i for i, ghost in enumerate(self.ghosts)} if game.ai.queue else {}
+        self.ai_queue = tuple((positions[id(ghost)], restart_timer) for ghost, restart_timer in game.ai.queue)
+        self.map_rng = game.map_rng
+        # The map's RNG decides ghost moves, so restoring it makes the future replay too
+        self.rng_state = game.rng.getstate() if include_rng else None
+        self.map_rng_state = game.map_rng.getstate() if include_rng else None
+
+    def restore(self, game):
+        """Write this snapshot back into a game"""
+        values = layout(len(self.ghosts)).unpack(self.data)
+        (game.level, game.map_index, game.total_pellets, game.pellets_eaten, game.game_over, game.win,
+         game.life_lost_timer, game.level_complete_timer) = values[:8]
+
+        pacman = self.pacman
+        (pacman.fx, pacman.fy, dx, dy, next_dx, next_dy, pacman.score, pacman.lives,
+         pacman.power_mode, pacman.power_timer, pacman.ghosts_eaten) = values[8:19]
+        pacman.direction = (dx, dy)
+        pacman.next_direction = (next_dx, next_dy)
+        pacman.prev_fx, pacman.prev_fy = pacman.fx, pacman.fy
+
+        index = 19
+        for ghost in self.ghosts:
+            (ghost.fx, ghost.fy, dx, dy, next_dx, next_dy, ghost.direction_timer,
+             ghost.last_direction_change, ghost.vulnerable, ghost.eaten) = values[index:index + 10]
+            ghost.direction = (dx, dy)
+            ghost.next_direction = (next_dx, next_dy)
+            ghost.prev_fx, ghost.prev_fy = ghost.fx, ghost.fy
+            index += 10
+
+        # Bumps the store's version, so the maze layer redraws the restored pellets
+        pellets = self.pellets
+        pellets.load(self.pellet_kinds, self.remaining)
+
+        game.life_lost_message, game.level_complete_message = self.messages
+        game.walls = self.walls
+        game.pellets = pellets
+        game.navigator = self.navigator
+        game.flow_field = self.flow_field
+        game.width, game.height = pellets.width, pellets.height
+        game.start = self.start
+        game.pacman = pacman
+        game.ghosts = list(self.ghosts)
+        game.rebuild_ghost_index()
+        game.ai.clear()
+        for i, restart_timer in self.ai_queue:
+            ghost = self.ghosts[i]
+            ghost.decision_pending = True
+            game.ai.queue.append((ghost, restart_timer))
+        game.map_rng = self.map_rng
+        if self.rng_state is not None:
+            game.rng.setstate(self.rng_state)
+            self.map_rng.setstate(self.map_rng_state)
+
+    def __len__(self):
+        """Size of the copied buffers in bytes"""
+        return len(self.data) + len(self.pellet_kinds)
+
+
+def main():
+    from game import Game
+    from headless import HeadlessRunner, RandomInput
+
+    parser = argparse.ArgumentParser(description="Benchmark Game.snapshot() and Game.restore()")
+    parser.add_argument("--count", type=int, default=100000, help="snapshots to take and restore")
+    parser.add_argument("--map-width", type=int, default=MAP_WIDTH, help="map width in tiles")
+    parser.add_argument("--map-height", type=int, default=MAP_HEIGHT, help="map height in tiles")
+    args = parser.parse_args()
+
+    game = Game(args.map_width, args.map_height, seed=0)
+    # Play a little first so the snapshot holds a game in progress
+    HeadlessRunner(game, input_source=RandomInput(seed=0)).run(300)
+
+    start = time.perf_counter()
+    for _ in range(args.count):
+        snapshot = game.snapshot()
+    snapshot_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.count):
+        game.restore(snapshot)
+    restore_time = time.perf_counter() - start
+
+    print(f"Map {args.map_width}x{args.map_height}, {len(game.ghosts)} ghosts, {len(snapshot)} bytes per snapshot")
+    print(f"Snapshots per second: {args.count / snapshot_time:.0f}")
+    print(f"Restores per second: {args.count / restore_time:.0f}")
+
+
+if __name__ == "__main__":
+    main()
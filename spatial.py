@@ -0,0 +1,84 @@
+"""
+Uniform-grid spatial index for actor collision queries
+"""
+
+from constants import TILE_SIZE
+
+
+class SpatialHash:
+    """Actors bucketed by the grid cell (tile by default) their center is in
+
+    Collision queries only look at the cells overlapping the query circle,
+    so their cost depends on how crowded that neighbourhood is rather than
+    on the total number of actors. Results come back in insertion order, so
+    "first colliding actor" means the same thing it does for a plain list.
+    """
+
+    def __init__(self, cell_size=TILE_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> list of actors
+        self.actor_cells = {}  # actor -> its current cell
+        self.order = {}  # actor -> insertion order
+        self.next_order = 0
+
+    def cell_of(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, actor):
+        """Add an actor at its current (x, y)"""
+        cell = self.cell_of(actor.x, actor.y)
+        self.cells.setdefault(cell, []).append(actor)
+        self.actor_cells[actor] = cell
+        self.order[actor] = self.next_order
+        self.next_order += 1
+
+    def remove(self, actor):
+        """Drop an actor from the index (no-op if it is not in it)"""
+        cell = self.actor_cells.pop(actor, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        bucket.remove(actor)
+        if not bucket:
+            del self.cells[cell]
+        del self.order[actor]
+
+    def move(self, actor):
+        """Re-bucket an actor after it moved; cheap when it stayed in its cell"""
+        old_cell = self.actor_cells.get(actor)
+        if old_cell is None:
+            return
+        cell = self.cell_of(actor.x, actor.y)
+        if cell == old_cell:
+            return
+        bucket = self.cells[old_cell]
+        bucket.remove(actor)
+        if not bucket:
+            del self.cells[old_cell]
+        self.cells.setdefault(cell, []).append(actor)
+        self.actor_cells[actor] = cell
+
+    def query(self, x, y, radius):
+        """Return actors whose cells overlap the circle at (x, y), in insertion order
+
+        Callers still do the exact (squared) distance test; this only narrows
+        the candidates down to the neighbouring cells.
+        """
+        min_x, min_y = self.cell_of(x - radius, y - radius)
+        max_x, max_y = self.cell_of(x + radius, y + radius)
+        found = []
+        cells = self.cells
+        for cell_y in range(min_y, max_y + 1):
+            for cell_x in range(min_x, max_x + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket:
+                    found.extend(bucket)
+        if len(found) > 1:
+            found.sort(key=self.order.__getitem__)
+        return found
+
+    def __len__(self):
+        return len(self.actor_cells)
+
+    def __contains__(self, actor):
+        return actor in self.actor_cells
@@ -0,0 +1,99 @@
+"""
+Pre-rendered sprite atlas for Pacman and the ghosts
+"""
+
+import math
+import pygame
+from constants import TILE_SIZE, BLACK, BLUE, WHITE, YELLOW, RED, PINK, CYAN, ORANGE, GREEN
+
+
+PACMAN_DIRECTIONS = [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+POWER_YELLOW = (255, 255, 100)  # Slightly different yellow when powered
+GHOST_COLORS = [RED, PINK, CYAN, ORANGE, GREEN, (255, 100, 255), BLUE, WHITE]
+
+
+class SpriteAtlas:
+    """Every actor frame rendered once, so drawing an actor is a single blit
+
+    Pacman has a frame per direction and power state. Ghosts have a frame
+    per body color; the vulnerable flash simply uses the BLUE and WHITE
+    frames. Eaten ghosts are not drawn, so they need no frame. Frames for
+    colors not known up front are rendered the first time they are asked for.
+    """
+
+    def __init__(self, radius=TILE_SIZE // 2 - 3):
+        self.radius = radius
+        # Sprites are padded so the center of the actor lands on self.center,
+        # with room below for the ghosts' wavy bottom
+        self.center = radius + 1
+        self.size = (2 * radius + 2, 2 * radius + 6)
+
+        self.pacman = {}
+        for direction in PACMAN_DIRECTIONS:
+            for power_mode in (False, True):
+                self.pacman[(direction, power_mode)] = self.render_pacman(direction, power_mode)
+
+        self.ghosts = {}
+        for color in GHOST_COLORS:
+            self.ghosts[color] = self.render_ghost(color)
+
+    def new_surface(self):
+        surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        # Match the display's pixel format when there is one, for faster blits
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        return surface
+
+    def render_pacman(self, direction, power_mode):
+        """Render Pacman the way Pacman.draw used to draw him every frame"""
+        surface = self.new_surface()
+        c = self.center
+        r = self.radius
+        color = POWER_YELLOW if power_mode else YELLOW
+        pygame.draw.circle(surface, color, (c, c), r)
+
+        if direction != (0, 0):
+            dx, dy = direction
+            angle = math.atan2(dy, dx)
+            mouth_angle = 0.4  # Half of mouth opening
+            p2 = (int(c + r * math.cos(angle - mouth_angle)), int(c + r * math.sin(angle - mouth_angle)))
+            p3 = (int(c + r * math.cos(angle + mouth_angle)), int(c + r * math.sin(angle + mouth_angle)))
+            pygame.draw.polygon(surface, BLACK, [(c, c), p2, p3])
+        return surface
+
+    def render_ghost(self, color):
+        """Render a ghost body in the given color the way Ghost.draw used to"""
+        surface = self.new_surface()
+        c = self.center
+        r = self.radius
+        pygame.draw.circle(surface, color, (c, c), r)
+
+        # Wavy bottom
+        bottom_y = c + r
+        wave_points = []
+        for i in range(0, r * 2, 4):
+            wave_points.append((c + i - r, int(bottom_y + math.sin(i * 0.5) * 3)))
+        if len(wave_points) > 2:
+            pygame.draw.polygon(surface, color, wave_points)
+
+        # Eyes and pupils
+        eye_offset = r // 3
+        for eye_x in (c - eye_offset, c + eye_offset):
+            pygame.draw.circle(surface, WHITE, (eye_x, c - eye_offset), 3)
+            pygame.draw.circle(surface, BLACK, (eye_x, c - eye_offset), 1)
+        return surface
+
+    def pacman_frame(self, direction, power_mode):
+        return self.pacman[(direction, power_mode)]
+
+    def ghost_frame(self, color):
+        frame = self.ghosts.get(color)
+        if frame is None:
+            frame = self.render_ghost(color)
+            self.ghosts[color] = frame
+        return frame
+
+    def blit(self, screen, frame, x, y):
+        """Blit a frame centered on (x, y) and return the screen rect it covered"""
+        return screen.blit(frame, (int(x) - self.center, int(y) - self.center))